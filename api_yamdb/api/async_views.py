@@ -0,0 +1,52 @@
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.urls import URLPattern
+from rest_framework.permissions import SAFE_METHODS
+
+
+def as_async_view(view):
+    '''Асинхронная обёртка над view вьюсета DRF для работы под ASGI.
+
+    Django 3.2 выполняет синхронные view под ASGI в одном общем потоке
+    (``thread_sensitive=True``), так что запросы процесса обрабатываются
+    по очереди. Безопасные запросы здесь уходят в пул потоков и идут
+    параллельно, а событийный цикл тем временем обслуживает медленных
+    клиентов. Запись выполняется как раньше, в общем потоке. Код вьюсета
+    не меняется: фильтры, права и пагинация те же. Асинхронного ORM в
+    Django 3.2 нет, поэтому запросы к БД остаются синхронными.
+    '''
+    def run(request, *args, **kwargs):
+        # Сигналы request_started/finished закрывают соединения только
+        # в общем потоке, соединения потоков пула обслуживаются здесь.
+        close_old_connections()
+        try:
+            response = view(request, *args, **kwargs)
+            response.render()
+            return response
+        finally:
+            close_old_connections()
+
+    run_read = sync_to_async(run, thread_sensitive=False)
+    run_write = sync_to_async(run, thread_sensitive=True)
+
+    async def async_view(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await run_read(request, *args, **kwargs)
+        return await run_write(request, *args, **kwargs)
+
+    async_view.csrf_exempt = True
+    async_view.cls = view.cls
+    async_view.actions = view.actions
+    return async_view
+
+
+def with_async_reads(patterns, viewsets):
+    '''Заменяет маршруты роутера для ``viewsets`` асинхронными.'''
+    return [
+        URLPattern(
+            pattern.pattern, as_async_view(pattern.callback),
+            pattern.default_args, pattern.name
+        )
+        if getattr(pattern.callback, 'cls', None) in viewsets else pattern
+        for pattern in patterns
+    ]
@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api_yamdb.routers import use_primary
+from .cache import get_cache
+
+USER_CLAIMS = ('username', 'role', 'is_staff', 'is_superuser')
+USER_STATE_FIELDS = USER_CLAIMS + ('is_active',)
+USER_STATE_KEY = 'api:user_state:{user_id}'
+
+
+class RoleAccessToken(AccessToken):
+    '''Access-токен, в котором есть имя и роль пользователя.'''
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+def get_user_state(user_model, user_id):
+    '''Поля пользователя, от которых зависит доступ; None, если его нет.'''
+    key = USER_STATE_KEY.format(user_id=user_id)
+    state = get_cache().get(key)
+    if state is None:
+        with use_primary():
+            state = user_model.objects.filter(pk=user_id).values(
+                *USER_STATE_FIELDS
+            ).first()
+        get_cache().set(
+            key, state or {}, settings.JWT_REVOCATION_CACHE_TIMEOUT
+        )
+    return state or None
+
+
+def forget_user_state(user_id):
+    get_cache().delete(USER_STATE_KEY.format(user_id=user_id))
+
+
+def load_full_user(user):
+    '''Догружает одним запросом поля, которых не было в токене.'''
+    deferred_fields = user.get_deferred_fields()
+    if deferred_fields:
+        user.refresh_from_db(fields=deferred_fields)
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    '''JWT-аутентификация без чтения строки пользователя из базы.
+
+    Пользователь собирается из claims токена: это экземпляр модели, в
+    котором загружены только id, имя, роль и флаги, а остальные поля
+    отложены и читаются из базы при первом обращении. Правам доступа и
+    записи отзывов этого достаточно. При ``JWT_REVOCATION_CHECK`` роль и
+    активность берутся из кэша ``API_CACHE_ALIAS`` на
+    ``JWT_REVOCATION_CACHE_TIMEOUT`` секунд, и запись удаляется при
+    изменении пользователя, так что удалённый или заблокированный
+    пользователь теряет доступ. Удаление видно всем воркерам только в
+    общем кэше: с кэшем, своим у каждого процесса, остальные воркеры
+    пускают пользователя со старой ролью до истечения записи. Токены без
+    claims обрабатываются как раньше.
+    '''
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'Token contained no recognizable user identification'
+            )
+        if settings.JWT_REVOCATION_CHECK:
+            state = get_user_state(self.user_model, user_id)
+            if state is None:
+                raise AuthenticationFailed(
+                    'User not found', code='user_not_found'
+                )
+            if not state['is_active']:
+                raise AuthenticationFailed(
+                    'User is inactive', code='user_inactive'
+                )
+        elif all(claim in validated_token for claim in USER_CLAIMS):
+            state = {claim: validated_token[claim] for claim in USER_CLAIMS}
+            state['is_active'] = True
+        else:
+            return super().get_user(validated_token)
+        values = {self.user_model._meta.pk.attname: user_id, **state}
+        # from_db ждёт значения в порядке полей модели.
+        field_names = [
+            field.attname for field in self.user_model._meta.concrete_fields
+            if field.attname in values
+        ]
+        return self.user_model.from_db(
+            DEFAULT_DB_ALIAS, field_names,
+            [values[name] for name in field_names]
+        )
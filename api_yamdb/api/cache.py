@@ -0,0 +1,235 @@
+import time
+from collections import Counter
+from contextlib import nullcontext
+from hashlib import md5
+from threading import Lock
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from api_yamdb.routers import get_read_database, use_primary
+
+CACHE_ALIAS = getattr(settings, 'API_CACHE_ALIAS', 'default')
+VERSION_KEY = 'api:version:{group}'
+BUMPED_KEY = 'api:bumped:{group}'
+ALL_GROUPS = 'all'
+PENDING_GROUPS_ATTR = 'api_pending_cache_groups'
+RESPONSE_KEY = 'api:response:{digest}'
+
+_stats = Counter()
+_stats_lock = Lock()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _count(group, outcome):
+    with _stats_lock:
+        _stats[(group, outcome)] += 1
+
+
+def get_stats():
+    '''Счётчики попаданий и промахов кэша в текущем процессе.'''
+    with _stats_lock:
+        snapshot = dict(_stats)
+    groups = {}
+    for (group, outcome), value in snapshot.items():
+        groups.setdefault(
+            group, {'hits': 0, 'misses': 0, 'not_modified': 0}
+        )[outcome] = value
+    for counters in groups.values():
+        total = counters['hits'] + counters['misses']
+        counters['hit_ratio'] = counters['hits'] / total if total else 0
+    return groups
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def initial_version():
+    '''Начальное значение счётчика версии: текущее время в микросекундах.
+
+    Вытесненный из кэша счётчик начинается заново не с нуля, а с
+    текущего времени, поэтому не повторяет прежних значений, и старые
+    ETag не совпадают с новыми.
+    '''
+    return int(time.time() * 10 ** 6)
+
+
+def read_consistent(groups):
+    '''Читает из основной базы, если реплика могла не догнать изменения.
+
+    Ответ, построенный по отстающей реплике сразу после смены версии,
+    попал бы в кэш под новой версией и жил бы до следующего изменения.
+    '''
+    lag = getattr(settings, 'REPLICA_LAG_SECONDS', 0)
+    if get_read_database() and lag > 0:
+        bumped = get_cache().get_many(
+            [BUMPED_KEY.format(group=group) for group in groups]
+        )
+        if any(time.time() - value < lag for value in bumped.values()):
+            return use_primary()
+    return nullcontext()
+
+
+def get_versions(groups):
+    '''Текущие версии групп одним обращением к кэшу.
+
+    Версии — счётчики в общем для всех процессов кэше, поэтому запись в
+    любом процессе или команде управления сразу меняет ETag, а попадание
+    в кэш и 304 не обращаются к базе.
+    '''
+    cache = get_cache()
+    keys = [VERSION_KEY.format(group=group) for group in groups]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = initial_version()
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+            versions[key] = version
+    return [str(versions[key]) for key in keys]
+
+
+def bump_versions(groups):
+    '''Увеличивает версии групп и возвращает новые значения.'''
+    cache = get_cache()
+    versions = {}
+    for group in groups:
+        key = VERSION_KEY.format(group=group)
+        try:
+            version = cache.incr(key)
+        except ValueError:
+            version = initial_version()
+            if not cache.add(key, version, None):
+                version = cache.incr(key)
+        versions[group] = str(version)
+    lag = getattr(settings, 'REPLICA_LAG_SECONDS', 0)
+    if settings.DATABASE_REPLICAS and lag > 0:
+        # Время смены версии нужно read_consistent, а хранить его дольше
+        # отставания реплик незачем.
+        cache.set_many(
+            {BUMPED_KEY.format(group=group): time.time() for group in groups},
+            lag
+        )
+    return versions
+
+
+def invalidate(*groups):
+    '''Сбрасывает закэшированные ответы групп после коммита транзакции.
+
+    Группы копятся на соединении, и первый же обработчик коммита меняет
+    версии всех накопленных групп по одному разу. Группы из откаченной
+    транзакции достаются следующему коммиту: лишняя смена версии
+    безопасна.
+    '''
+    connection = transaction.get_connection()
+    pending = getattr(connection, PENDING_GROUPS_ATTR, None)
+    if pending is None:
+        pending = set()
+        setattr(connection, PENDING_GROUPS_ATTR, pending)
+    pending.update(groups)
+
+    def bump():
+        if pending:
+            groups = list(pending)
+            pending.clear()
+            bump_versions(groups)
+
+    transaction.on_commit(bump)
+
+
+def invalidate_all():
+    '''Сбрасывает все ответы, например после массовой загрузки без сигналов.'''
+    invalidate(ALL_GROUPS)
+
+
+def get_response_digest(request, versions):
+    '''Хэш нормализованного URL и версий групп: ключ кэша и ETag.'''
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    url = request.build_absolute_uri(request.path)
+    versions = ':'.join(versions)
+    return md5(f'{versions}:{url}?{query}'.encode()).hexdigest()
+
+
+class CachedResponseMixin:
+    '''Read-through кэш и условный GET для ответов списка.
+
+    Ключ и ETag строятся из нормализованного URL и версий групп из
+    ``get_cache_groups``; версии меняются сигналами при изменении моделей
+    (см. api.signals). Версии и ответы хранятся в кэше ``API_CACHE_ALIAS``,
+    при нескольких процессах он должен быть общим, например memcached.
+    При ``cache_responses = False`` выдаётся только ETag.
+    '''
+    cache_group = None
+    cache_responses = True
+
+    def get_cache_groups(self):
+        return (self.cache_group,)
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        groups = (ALL_GROUPS, *self.get_cache_groups())
+        versions = get_versions(groups)
+        digest = get_response_digest(request, versions)
+        etag = quote_etag(digest)
+        if_none_match = parse_etags(
+            request.META.get('HTTP_IF_NONE_MATCH', '')
+        )
+        if etag in if_none_match:
+            return self.not_modified(etag)
+        response = self.get_response(
+            digest, groups, handler, request, *args, **kwargs
+        )
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+            # «*» совпадает с любой версией, но только существующего
+            # ресурса: для отсутствующего остаётся 404.
+            if '*' in if_none_match:
+                return self.not_modified(etag)
+        return response
+
+    def not_modified(self, etag):
+        _count(self.cache_group, 'not_modified')
+        return Response(
+            status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag}
+        )
+
+    def get_response(self, digest, groups, handler, request, *args,
+                     **kwargs):
+        cache = get_cache()
+        key = RESPONSE_KEY.format(digest=digest)
+        data = cache.get(key) if self.cache_responses else None
+        if data is not None:
+            _count(self.cache_group, 'hits')
+            return Response(data)
+        if self.cache_responses:
+            _count(self.cache_group, 'misses')
+        with read_consistent(groups):
+            response = handler(request, *args, **kwargs)
+        if self.cache_responses and (
+            response.status_code == status.HTTP_200_OK
+        ):
+            cache.set(key, response.data)
+        return response
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+    '''То же для ответов на запрос одного объекта.'''
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
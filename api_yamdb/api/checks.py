@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+from .cache import CACHE_ALIAS
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+
+@register()
+def check_replica_cache(app_configs, **kwargs):
+    '''С репликами метка «читать из основной базы» должна быть общей.
+
+    Метка ставится после записи в кэш ``API_CACHE_ALIAS``. Если кэш свой
+    у каждого процесса, следующий запрос пользователя попадает в другой
+    воркер, читает из реплики и не видит своих изменений.
+    '''
+    backend = settings.CACHES[CACHE_ALIAS]['BACKEND']
+    if settings.DATABASE_REPLICAS and backend in PROCESS_LOCAL_CACHES:
+        return [Warning(
+            f'Cache "{CACHE_ALIAS}" uses {backend}, which is local to one '
+            'process.',
+            hint=(
+                'Database replicas need a shared cache such as memcached, '
+                'or users may not see their own writes.'
+            ),
+            id='api.W001',
+        )]
+    return []
+
+
+@register(deploy=True)
+def check_revocation_cache(app_configs, **kwargs):
+    '''Отзыв токена сразу действует во всех воркерах только с общим кэшем.
+
+    Состояние пользователя удаляется из кэша только в процессе, где
+    пользователь изменён; другие процессы доверяют своей копии до
+    ``JWT_REVOCATION_CACHE_TIMEOUT`` секунд.
+    '''
+    backend = settings.CACHES[CACHE_ALIAS]['BACKEND']
+    if settings.JWT_REVOCATION_CHECK and backend in PROCESS_LOCAL_CACHES:
+        return [Warning(
+            f'Cache "{CACHE_ALIAS}" uses {backend}, which is local to one '
+            'process.',
+            hint=(
+                'With several workers a blocked or demoted user keeps '
+                'access for up to JWT_REVOCATION_CACHE_TIMEOUT seconds; '
+                'use a shared cache such as memcached.'
+            ),
+            id='api.W002',
+        )]
+    return []
@@ -1,2 +1,4 @@
 USERNAME_MAX_LENGTH = 128
 EMAIL_MAX_LENGTH = 150
+SUGGEST_LIMIT = 10
+SUGGEST_MAX_LIMIT = 20
@@ -0,0 +1,60 @@
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.db.models import Count
+
+from reviews.models import GenreTitle
+from .cache import ALL_GROUPS, get_cache, get_versions, read_consistent
+
+FACETS_GROUP = 'facets'
+FACETS_KEY = 'api:facets:{digest}'
+FACETS_QUERY_PARAM = 'facets'
+NON_FILTER_PARAMS = ('page', 'page_size', 'cursor', FACETS_QUERY_PARAM)
+RATING_PARAMS = ('rating__gte',)
+
+
+def count_facets(queryset):
+    '''Число произведений выборки по жанрам, категориям и годам.'''
+    titles = queryset.order_by()
+    genres = GenreTitle.objects.filter(
+        title__in=titles.values('pk')
+    ).order_by().values_list('genre__slug').annotate(count=Count('pk'))
+    categories = titles.filter(category__isnull=False).values_list(
+        'category__slug'
+    ).annotate(count=Count('pk'))
+    years = titles.values_list('year').annotate(count=Count('pk'))
+    return {
+        'genre': dict(genres),
+        'category': dict(categories),
+        'year': {str(year): count for year, count in years},
+    }
+
+
+def get_facets(queryset, request):
+    '''Счётчики фасетов, закэшированные до изменения состава выдачи.
+
+    Ключ зависит только от параметров фильтрации, поэтому все страницы
+    одной выдачи и все клиенты с одинаковым фильтром делят одни счётчики;
+    пересчёт происходит один раз после изменения произведений, их жанров
+    или словарей. Новые отзывы меняют только рейтинг и счётчики не
+    сбрасывают, если выдача не отфильтрована по рейтингу.
+    '''
+    params = sorted(
+        (name, values) for name, values in request.query_params.lists()
+        if name not in NON_FILTER_PARAMS
+    )
+    groups = [ALL_GROUPS, FACETS_GROUP]
+    if any(name in RATING_PARAMS for name, _ in params):
+        groups.append('titles')
+    versions = get_versions(groups)
+    digest = md5(
+        f'{":".join(versions)}:{urlencode(params, doseq=True)}'.encode()
+    ).hexdigest()
+    cache = get_cache()
+    key = FACETS_KEY.format(digest=digest)
+    facets = cache.get(key)
+    if facets is None:
+        with read_consistent(groups):
+            facets = count_facets(queryset)
+        cache.set(key, facets)
+    return facets
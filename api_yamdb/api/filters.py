@@ -1,16 +1,44 @@
 from django_filters import rest_framework as filters
 
-from reviews.models import Title
+from reviews.models import GenreTitle, Title
+from reviews.search import search_titles
+
+
+class CharInFilter(filters.BaseInFilter, filters.CharFilter):
+    pass
 
 
 class TitleFilter(filters.FilterSet):
-    genre = filters.CharFilter(field_name='genre__slug', lookup_expr='exact')
+    genre = filters.CharFilter(method='filter_genre')
+    genre__in = CharInFilter(method='filter_genre')
     category = filters.CharFilter(
         field_name='category__slug',
         lookup_expr='exact'
     )
-    name = filters.CharFilter(field_name='name', lookup_expr='contains')
+    category__in = CharInFilter(field_name='category__slug', lookup_expr='in')
+    year__gte = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year__lte = filters.NumberFilter(field_name='year', lookup_expr='lte')
+    rating__gte = filters.NumberFilter(field_name='rating', lookup_expr='gte')
+    name = filters.CharFilter(method='filter_name')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = '__all__'
+        # Денормализованные rating_sum и rating_count — не фильтры API.
+        fields = ('name', 'year', 'description', 'genre', 'category')
+
+    def filter_genre(self, queryset, name, value):
+        '''Полусоединение с GenreTitle: строки не дублируются без DISTINCT.'''
+        slugs = value if isinstance(value, list) else [value]
+        return queryset.filter(pk__in=GenreTitle.objects.filter(
+            genre__slug__in=slugs
+        ).values('title_id'))
+
+    def filter_name(self, queryset, name, value):
+        return search_titles(queryset, value, name_only=True)
+
+    def filter_search(self, queryset, name, value):
+        '''Поиск по названию и описанию, самые релевантные — первыми.'''
+        return search_titles(queryset, value).order_by(
+            '-search_rank', '-rating', '-id'
+        )
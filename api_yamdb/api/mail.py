@@ -0,0 +1,161 @@
+import atexit
+import heapq
+import logging
+import os
+import queue
+import threading
+import time
+from itertools import count
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+logger = logging.getLogger(__name__)
+
+
+class MailQueue:
+    '''Отправка писем фоновым потоком вне обработки запроса.
+
+    Поток забирает письма пачками до ``EMAIL_QUEUE_BATCH_SIZE`` и
+    отправляет их через одно соединение с почтовым сервером; соединение
+    живёт, пока приходят письма, и закрывается после
+    ``EMAIL_QUEUE_IDLE_TIMEOUT`` секунд простоя. Неотправленное письмо
+    повторяется через ``EMAIL_QUEUE_RETRY_DELAY`` секунд с удвоением
+    задержки, не более ``EMAIL_QUEUE_MAX_ATTEMPTS`` попыток. При
+    ``EMAIL_QUEUE_EAGER`` письма отправляются сразу, например в тестах.
+    '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid = None
+        self.thread = None
+
+    def start(self):
+        with self.lock:
+            if self.pid == os.getpid():
+                if self.thread.is_alive():
+                    return
+            else:
+                # После fork поток родителя в процессе отсутствует, а его
+                # письма отправит сам родитель.
+                self.pid = os.getpid()
+                self.queue = queue.Queue()
+                self.retries = []
+                self.order = count()
+            self.thread = threading.Thread(
+                target=self.run, name='mail-queue', daemon=True
+            )
+            self.thread.start()
+
+    def send(self, message):
+        if settings.EMAIL_QUEUE_EAGER:
+            message.send()
+            return
+        self.start()
+        self.queue.put((1, message))
+
+    def flush(self, timeout=None):
+        '''Ждёт отправки всех писем, включая ожидающие повтора.'''
+        if self.thread is None or self.pid != os.getpid():
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def next_batch(self, connection):
+        '''Следующая пачка писем; пустая, если соединение простаивает.'''
+        timeout = settings.EMAIL_QUEUE_IDLE_TIMEOUT if connection else None
+        if self.retries:
+            due = max(self.retries[0][0] - time.monotonic(), 0)
+            timeout = due if timeout is None else min(timeout, due)
+        batch = []
+        try:
+            batch.append(self.queue.get(timeout=timeout))
+        except queue.Empty:
+            pass
+        while self.retries and self.retries[0][0] <= time.monotonic():
+            _, _, attempt, message = heapq.heappop(self.retries)
+            batch.append((attempt, message))
+        while len(batch) < settings.EMAIL_QUEUE_BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        connection = None
+        while True:
+            batch = []
+            try:
+                batch = self.next_batch(connection)
+                if not batch:
+                    if connection is not None and not self.retries:
+                        connection = self.close(connection)
+                    continue
+                connection = self.send_batch(connection, batch)
+            except Exception:
+                # Поток не должен умирать: письма пачки, которые не успели
+                # обработать, завершаются, иначе flush ждал бы их вечно.
+                logger.exception(
+                    'Mail queue failed, dropping %s emails', len(batch)
+                )
+                for _ in batch:
+                    self.queue.task_done()
+                connection = None
+
+    def send_batch(self, connection, batch):
+        '''Отправляет пачку; обработанные письма убираются из неё.'''
+        while batch:
+            attempt, message = batch[0]
+            try:
+                if connection is None:
+                    connection = get_connection()
+                connection.open()
+                connection.send_messages([message])
+            except Exception:
+                logger.warning(
+                    'Failed to send email to %s, attempt %s',
+                    message.to, attempt, exc_info=True
+                )
+                self.retry(attempt, message)
+                # Соединение могло оборваться: следующее письмо откроет новое.
+                connection = self.close(connection)
+            else:
+                self.queue.task_done()
+            batch.pop(0)
+        return connection
+
+    def close(self, connection):
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        return None
+
+    def retry(self, attempt, message):
+        if attempt >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+            logger.error('Giving up on email to %s', message.to)
+            self.queue.task_done()
+            return
+        delay = settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (attempt - 1)
+        # Письмо остаётся незавершённой задачей очереди до отправки.
+        heapq.heappush(self.retries, (
+            time.monotonic() + delay, next(self.order), attempt + 1, message
+        ))
+
+
+mail_queue = MailQueue()
+atexit.register(mail_queue.flush, timeout=10)
+
+
+def queue_mail(subject, message, from_email, recipient_list):
+    '''То же, что send_mail, но без ожидания почтового сервера.'''
+    mail_queue.send(EmailMessage(
+        subject=subject, body=message,
+        from_email=from_email, to=recipient_list,
+    ))
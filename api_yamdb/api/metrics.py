@@ -0,0 +1,236 @@
+import asyncio
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+UNMATCHED_ROUTE = 'unmatched'
+OTHER_METHOD = 'other'
+# Метод приходит от клиента: без списка каждый выдуманный метод
+# заводил бы новую серию метрик.
+KNOWN_METHODS = frozenset((
+    'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE',
+    'CONNECT'
+))
+
+_current = ContextVar('api_metrics_request', default=None)
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+class RequestMetrics:
+    '''Запросы к БД и время сериализации одного HTTP-запроса.'''
+    __slots__ = ('queries', 'query_time', 'serializer_time', 'serializing')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+
+class RouteMetrics:
+    '''Накопленные метрики маршрута: гистограмма времени и суммы.'''
+    __slots__ = (
+        'buckets', 'count', 'duration', 'queries', 'query_time',
+        'serializer_time'
+    )
+
+    def __init__(self):
+        self.buckets = [0] * len(settings.METRICS_BUCKETS)
+        self.count = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+
+    def add(self, duration, request_metrics):
+        for index, bound in enumerate(settings.METRICS_BUCKETS):
+            if duration <= bound:
+                self.buckets[index] += 1
+                break
+        self.count += 1
+        self.duration += duration
+        self.queries += request_metrics.queries
+        self.query_time += request_metrics.query_time
+        self.serializer_time += request_metrics.serializer_time
+
+
+def record_query(execute, sql, params, many, context):
+    request_metrics = _current.get()
+    if request_metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        request_metrics.queries += 1
+        request_metrics.query_time += time.perf_counter() - start
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    # В начало списка: execute_wrapper() снимает обёртки с конца.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class TimedSerializerMixin:
+    '''Учитывает время to_representation в метриках запроса.
+
+    Вложенные сериализаторы не учитываются повторно, у списка
+    суммируется время по элементам.
+    '''
+
+    def to_representation(self, instance):
+        request_metrics = _current.get()
+        if request_metrics is None or request_metrics.serializing:
+            return super().to_representation(instance)
+        request_metrics.serializing = True
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            request_metrics.serializing = False
+            request_metrics.serializer_time += time.perf_counter() - start
+
+
+def get_route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None or not match.url_name:
+        return UNMATCHED_ROUTE
+    return match.url_name
+
+
+def get_method(request):
+    if request.method in KNOWN_METHODS:
+        return request.method
+    return OTHER_METHOD
+
+
+def record(request, duration, request_metrics):
+    key = (get_route(request), get_method(request))
+    with _metrics_lock:
+        route_metrics = _metrics.get(key)
+        if route_metrics is None:
+            route_metrics = _metrics[key] = RouteMetrics()
+        route_metrics.add(duration, request_metrics)
+
+
+def get_metrics():
+    '''Метрики маршрутов в текущем процессе.'''
+    bounds = settings.METRICS_BUCKETS
+    with _metrics_lock:
+        snapshot = []
+        for (route, method), route_metrics in sorted(_metrics.items()):
+            cumulative, total = [], 0
+            for value in route_metrics.buckets:
+                total += value
+                cumulative.append(total)
+            snapshot.append({
+                'route': route,
+                'method': method,
+                'count': route_metrics.count,
+                'duration': route_metrics.duration,
+                'buckets': dict(zip(map(str, bounds), cumulative)),
+                'queries': route_metrics.queries,
+                'query_time': route_metrics.query_time,
+                'serializer_time': route_metrics.serializer_time,
+            })
+    return snapshot
+
+
+def reset_metrics():
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def render_prometheus(snapshot):
+    '''Метрики в текстовом формате Prometheus.'''
+    lines = [
+        '# TYPE yamdb_request_duration_seconds histogram',
+    ]
+    for item in snapshot:
+        labels = f'route="{item["route"]}",method="{item["method"]}"'
+        for bound, value in item['buckets'].items():
+            lines.append(
+                f'yamdb_request_duration_seconds_bucket'
+                f'{{{labels},le="{bound}"}} {value}'
+            )
+        lines.append(
+            f'yamdb_request_duration_seconds_bucket{{{labels},le="+Inf"}} '
+            f'{item["count"]}'
+        )
+        lines.append(
+            f'yamdb_request_duration_seconds_sum{{{labels}}} '
+            f'{item["duration"]:.6f}'
+        )
+        lines.append(
+            f'yamdb_request_duration_seconds_count{{{labels}}} '
+            f'{item["count"]}'
+        )
+    for name, field, kind in (
+        ('yamdb_db_queries_total', 'queries', 'counter'),
+        ('yamdb_db_query_duration_seconds_total', 'query_time', 'counter'),
+        ('yamdb_serializer_duration_seconds_total', 'serializer_time',
+         'counter'),
+    ):
+        lines.append(f'# TYPE {name} {kind}')
+        for item in snapshot:
+            labels = f'route="{item["route"]}",method="{item["method"]}"'
+            value = item[field]
+            if isinstance(value, float):
+                value = f'{value:.6f}'
+            lines.append(f'{name}{{{labels}}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    '''Время ответа, запросы к БД и сериализация по маршрутам.
+
+    Маршрут — имя из ``resolver_match`` (``titles-list``,
+    ``reviews-detail``). Запросы к БД считает обёртка, которая ставится
+    на каждое соединение при подключении и ничего не делает вне
+    запроса; сведения о запросе передаются через ContextVar и поэтому
+    доходят и до потоков асинхронных view. Метрики хранятся в памяти
+    процесса. Выключается через ``METRICS_ENABLED``.
+    '''
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Так Django 3.2 узнаёт асинхронный middleware.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        request_metrics = RequestMetrics()
+        token = _current.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        record(request, time.perf_counter() - start, request_metrics)
+        return response
+
+    async def __acall__(self, request):
+        request_metrics = RequestMetrics()
+        token = _current.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        record(request, time.perf_counter() - start, request_metrics)
+        return response
@@ -0,0 +1,117 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class TitlePagination(PageNumberPagination):
+    '''Пагинация произведений с дополнительным keyset-режимом.
+
+    Если в запросе есть параметр ``cursor``, страница выбирается условием
+    по ключу (rating, id) последней записи предыдущей страницы: без OFFSET
+    и без COUNT(*). Пустое значение ``cursor`` открывает первую страницу.
+    Курсор работает только с порядком ``ordering``: например, выдачу
+    поиска по релевантности так листать нельзя.
+    '''
+    cursor_query_param = 'cursor'
+    ordering = ('-rating', '-id')
+    invalid_cursor_message = 'Некорректный курсор.'
+    invalid_ordering_message = (
+        'Курсор недоступен для выдачи, отсортированной не по рейтингу.'
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+        if tuple(queryset.query.order_by) != self.ordering:
+            raise ValidationError(
+                {self.cursor_query_param: self.invalid_ordering_message}
+            )
+        self.request = request
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(
+                self.get_position_filter(queryset, *position)
+            )
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.results = results[:page_size]
+        return self.results
+
+    def get_position_filter(self, queryset, rating, pk):
+        '''Условие «после (rating, id)» для порядка ('-rating', '-id').
+
+        Место NULL в сортировке по убыванию зависит от СУБД, поэтому
+        условие повторяет то, как база сама отсортирует записи.
+        '''
+        nulls_first = connections[queryset.db].features.nulls_order_largest
+        if rating is None:
+            after = Q(rating__isnull=True, pk__lt=pk)
+            if nulls_first:
+                after |= Q(rating__isnull=False)
+            return after
+        after = Q(rating__lt=rating) | Q(rating=rating, pk__lt=pk)
+        if not nulls_first:
+            after |= Q(rating__isnull=True)
+        return after
+
+    def decode_cursor(self, request):
+        encoded = request.query_params[self.cursor_query_param]
+        if not encoded:
+            return None
+        try:
+            rating, pk = json.loads(urlsafe_b64decode(encoded.encode()))
+            if rating is not None:
+                rating = float(rating)
+            return rating, int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, title):
+        position = json.dumps([title.rating, title.pk]).encode()
+        return urlsafe_b64encode(position).decode()
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.results[-1])
+        )
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data)
+        ]))
+
+
+class NestedListPagination(PageNumberPagination):
+    '''Пагинация вложенных списков (отзывы, комментарии).
+
+    Вьюсет одним запросом проверяет существование родителя и считает его
+    дочерние записи, поэтому отдельный COUNT(*) по выборке не нужен.
+    '''
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = view.get_list_count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, object_list, per_page):
+        paginator = Paginator(object_list, per_page)
+        paginator.count = self.count
+        return paginator
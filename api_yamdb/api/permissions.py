@@ -1,40 +1,67 @@
 from rest_framework import permissions
 
+from users.models import CustomUser
+
+ROLES_ATTR = '_yamdb_roles'
+
+
+class Roles:
+    '''Роли пользователя запроса, вычисленные один раз.
+
+    Администратор — пользователь с ролью admin или суперпользователь,
+    модератор — с ролью moderator или администратор. Авторство
+    проверяется по ``author_id`` объекта, без загрузки автора.
+    '''
+
+    def __init__(self, user):
+        self.user = user
+        self.is_authenticated = bool(user and user.is_authenticated)
+        self.user_id = user.pk if self.is_authenticated else None
+        self.is_admin = self.is_authenticated and (
+            user.role == CustomUser.ADMIN or user.is_superuser
+        )
+        self.is_moderator = self.is_admin or (
+            self.is_authenticated and user.role == CustomUser.MODERATOR
+        )
+        self.decisions = {}
+
+    def is_author(self, obj):
+        return self.is_authenticated and obj.author_id == self.user_id
+
+    def can_edit(self, obj):
+        key = (type(obj), obj.pk)
+        if key not in self.decisions:
+            self.decisions[key] = self.is_moderator or self.is_author(obj)
+        return self.decisions[key]
+
+
+def get_roles(request):
+    roles = getattr(request, ROLES_ATTR, None)
+    if roles is None or roles.user is not request.user:
+        roles = Roles(request.user)
+        setattr(request, ROLES_ATTR, roles)
+    return roles
+
 
 class IsAdminPermission(permissions.BasePermission):
 
     def has_permission(self, request, view):
-        return (request.user.is_authenticated
-                and self.is_admin_or_superuser(request.user))
-
-    def is_admin_or_superuser(self, user):
-        return user.is_admin or user.is_superuser
+        return get_roles(request).is_admin
 
 
 class ModerAdminAuthorPermission(permissions.BasePermission):
 
     def has_permission(self, request, view):
         return (request.method in permissions.SAFE_METHODS
-                or request.user.is_authenticated)
+                or get_roles(request).is_authenticated)
 
     def has_object_permission(self, request, view, obj):
         return (request.method in permissions.SAFE_METHODS
-                or obj.author == request.user
-                or request.user.is_moderator
-                or self.is_admin_or_superuser(request.user))
-
-    def is_admin_or_superuser(self, user):
-        return user.is_admin or user.is_superuser
+                or get_roles(request).can_edit(obj))
 
 
 class AnonReadOnlyOrIsAdminPermission(permissions.BasePermission):
 
     def has_permission(self, request, view):
-        return (
-            request.method in permissions.SAFE_METHODS
-            or (request.user.is_authenticated
-                and self.is_admin_or_superuser(request.user))
-        )
-
-    def is_admin_or_superuser(self, user):
-        return user.is_staff or user.is_superuser
+        return (request.method in permissions.SAFE_METHODS
+                or get_roles(request).is_admin)
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import os
+import re
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('api_query_check', default=None)
+
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+PROJECT_DIR = str(settings.BASE_DIR) + os.sep
+LIBRARY_DIR = 'site-packages' + os.sep
+ORM_DIR = os.path.join('django', 'db', '')
+SKIPPED_FILES = (__file__, metrics.__file__)
+CALL_SITE_DEPTH = 4
+
+
+class RepeatedQueriesError(Exception):
+    '''Запрос одного вида повторяется в пределах HTTP-запроса (N+1).'''
+
+
+def get_shape(sql):
+    '''Вид запроса: SQL без параметров, списки IN любой длины одинаковы.'''
+    return IN_LIST.sub('IN (...)', sql)
+
+
+def get_call_site():
+    '''Цепочка вызовов, приведшая к запросу, без кода ORM.
+
+    В цепочке ``CALL_SITE_DEPTH`` ближайших кадров, а если среди них
+    нет кода проекта, то и ближайший кадр проекта.
+    '''
+    frames = []
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename
+        if filename in SKIPPED_FILES or ORM_DIR in filename:
+            continue
+        in_project = (
+            filename.startswith(PROJECT_DIR) and LIBRARY_DIR not in filename
+        )
+        if len(frames) < CALL_SITE_DEPTH or in_project:
+            name = filename.split(LIBRARY_DIR)[-1].replace(PROJECT_DIR, '')
+            frames.append(f'{name}:{frame.lineno} in {frame.name}')
+        if in_project:
+            break
+    return ' <- '.join(frames) or 'unknown'
+
+
+class QueryCheck:
+    '''Повторяющиеся и медленные запросы к БД в пределах одного запроса.'''
+
+    def __init__(self, threshold, slow_ms):
+        self.threshold = threshold
+        self.slow = slow_ms / 1000
+        self.shapes = Counter()
+        self.call_sites = {}
+        self.slow_queries = []
+
+    def add(self, sql, duration):
+        shape = get_shape(sql)
+        self.shapes[shape] += 1
+        if self.shapes[shape] == self.threshold:
+            self.call_sites[shape] = get_call_site()
+        if duration >= self.slow:
+            self.slow_queries.append((duration, sql, get_call_site()))
+
+    def get_repeated(self):
+        return [
+            (count, shape, self.call_sites[shape])
+            for shape, count in self.shapes.items()
+            if count >= self.threshold
+        ]
+
+    def describe_repeated(self):
+        return '\n'.join(
+            f'{count} queries from {call_site}: {shape}'
+            for count, shape, call_site in self.get_repeated()
+        )
+
+
+def check_query(execute, sql, params, many, context):
+    query_check = _current.get()
+    if query_check is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        query_check.add(sql, time.perf_counter() - start)
+
+
+@receiver(connection_created)
+def install_query_check(sender, connection, **kwargs):
+    # В начало списка: execute_wrapper() снимает обёртки с конца.
+    if check_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, check_query)
+
+
+@contextmanager
+def track_queries(threshold=None, slow_ms=None):
+    '''Собирает запросы к БД внутри блока в объект QueryCheck.'''
+    query_check = QueryCheck(
+        threshold or settings.QUERY_CHECK_THRESHOLD,
+        slow_ms or settings.QUERY_CHECK_SLOW_MS
+    )
+    token = _current.set(query_check)
+    try:
+        yield query_check
+    finally:
+        _current.reset(token)
+
+
+def report(request, query_check):
+    for duration, sql, call_site in query_check.slow_queries:
+        logger.warning(
+            'Slow query (%.0f ms) in %s %s from %s: %s',
+            duration * 1000, request.method, request.path, call_site, sql
+        )
+    if not query_check.get_repeated():
+        return
+    message = (
+        f'Repeated queries in {request.method} {request.path}:\n'
+        f'{query_check.describe_repeated()}'
+    )
+    if settings.QUERY_CHECK == 'raise':
+        raise RepeatedQueriesError(message)
+    logger.warning(message)
+
+
+class QueryCheckMiddleware:
+    '''Поиск N+1 и медленных запросов, включается ``QUERY_CHECK``.
+
+    ``log`` пишет найденное в лог, ``raise`` дополнительно завершает
+    запрос ошибкой RepeatedQueriesError, так что тест с таким запросом
+    падает. N+1 — запрос одного вида, повторённый
+    ``QUERY_CHECK_THRESHOLD`` раз; медленный — дольше
+    ``QUERY_CHECK_SLOW_MS`` миллисекунд. В отчёте указано место вызова в
+    коде проекта.
+    '''
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Так Django 3.2 узнаёт асинхронный middleware.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if settings.QUERY_CHECK == 'off':
+            return self.get_response(request)
+        with track_queries() as query_check:
+            response = self.get_response(request)
+        report(request, query_check)
+        return response
+
+    async def __acall__(self, request):
+        if settings.QUERY_CHECK == 'off':
+            return await self.get_response(request)
+        with track_queries() as query_check:
+            response = await self.get_response(request)
+        report(request, query_check)
+        return response
@@ -0,0 +1,55 @@
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+from api_yamdb.routers import read_from_replica, stop_reading_from_replica
+from .cache import get_cache
+
+STICKY_KEY = 'api:primary:{user_id}'
+
+
+def is_sticky(user):
+    return user.is_authenticated and bool(
+        get_cache().get(STICKY_KEY.format(user_id=user.pk))
+    )
+
+
+def make_sticky(user):
+    '''После записи пользователь какое-то время читает из основной базы.'''
+    get_cache().set(
+        STICKY_KEY.format(user_id=user.pk), True,
+        settings.REPLICA_LAG_SECONDS
+    )
+
+
+class ReplicaReadMixin:
+    '''Безопасные запросы вьюсета читают из реплики.
+
+    Пользователь, недавно изменявший данные через такой вьюсет, читает из
+    основной базы ``REPLICA_LAG_SECONDS`` секунд и сразу видит свои
+    изменения. Метка об этом хранится в кэше ``API_CACHE_ALIAS``, и при
+    нескольких воркерах он должен быть общим (см. api.checks). Решение
+    принимается после аутентификации, поэтому сам пользователь
+    загружается из основной базы.
+    '''
+    replica_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in SAFE_METHODS
+            and settings.DATABASE_REPLICAS
+            and not is_sticky(request.user)
+        ):
+            self.replica_token = read_from_replica()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        stop_reading_from_replica(self.replica_token)
+        self.replica_token = None
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+            and settings.DATABASE_REPLICAS
+        ):
+            make_sticky(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,157 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from django.db import models
+from rest_framework import serializers
+from rest_framework.fields import Field, SkipField
+from rest_framework.relations import PKOnlyObject, RelatedField
+
+SKIP = object()
+
+
+def has_plain_source(field, model):
+    '''Поле читает один атрибут модели стандартным get_attribute.'''
+    if field.source == '*' or len(field.source_attrs) != 1:
+        return False
+    if isinstance(field, RelatedField):
+        if (
+            type(field).get_attribute is not RelatedField.get_attribute
+            or field.use_pk_only_optimization()
+        ):
+            return False
+    elif type(field).get_attribute is not Field.get_attribute:
+        return False
+    # Методы модели DRF вызывает, такие поля идут обычным путём.
+    return not callable(getattr(model, field.source_attrs[0], None))
+
+
+def is_many_to_many(model, attr):
+    '''attr — прямое поле ManyToMany модели.'''
+    try:
+        field = model._meta.get_field(attr)
+    except (AttributeError, FieldDoesNotExist):
+        return False
+    return field.many_to_many and not field.auto_created
+
+
+def compile_slow_getter(field):
+    '''Чтение значения стандартным get_attribute поля.'''
+    def get(instance):
+        try:
+            value = field.get_attribute(instance)
+        except SkipField:
+            return SKIP
+        if isinstance(value, PKOnlyObject) and value.pk is None:
+            return None
+        return value
+
+    return get
+
+
+def compile_prefetched_getter(attr):
+    '''Чтение связи ManyToMany из кэша prefetch_related.'''
+    def get(instance):
+        # Менеджер связи создаётся заново при каждом обращении, это
+        # дороже самой сериализации; prefetch_related кладёт строки
+        # в кэш под именем поля.
+        cache = getattr(instance, '_prefetched_objects_cache', None)
+        if cache and attr in cache:
+            return cache[attr]
+        return getattr(instance, attr)
+
+    return get
+
+
+def compile_attribute_getter(attr, get_slow):
+    '''Чтение обычного атрибута, необычные случаи — через get_slow.'''
+    def get(instance):
+        try:
+            return getattr(instance, attr)
+        except ObjectDoesNotExist:
+            return None
+        except AttributeError:
+            return get_slow(instance)
+
+    return get
+
+
+def compile_getter(field, model):
+    '''Функция instance -> исходное значение поля.'''
+    get_slow = compile_slow_getter(field)
+    if not has_plain_source(field, model):
+        return get_slow
+    attr = field.source_attrs[0]
+    if is_many_to_many(model, attr):
+        return compile_prefetched_getter(attr)
+    return compile_attribute_getter(attr, get_slow)
+
+
+def compile_representer(field):
+    '''Функция значение -> представление поля.'''
+    if isinstance(field, serializers.ListSerializer):
+        child = compile_representation(field.child)
+
+        def represent(value):
+            if isinstance(value, models.Manager):
+                value = value.all()
+            return [child(item) for item in value]
+
+        return represent
+    if isinstance(field, serializers.BaseSerializer):
+        return compile_representation(field)
+    return field.to_representation
+
+
+def compile_value(field, model):
+    '''Функция instance -> значение поля без промежуточных проверок DRF.'''
+    get = compile_getter(field, model)
+    represent = compile_representer(field)
+
+    def value_of(instance):
+        value = get(instance)
+        if value is None or value is SKIP:
+            return value
+        return represent(value)
+
+    return value_of
+
+
+def compile_representation(serializer):
+    '''Функция instance -> dict, равная to_representation сериализатора.
+
+    Поля разбираются один раз: для каждого заранее выбраны способ чтения
+    атрибута и преобразование, вложенные сериализаторы компилируются
+    так же. Результат — обычный dict с теми же ключами в том же порядке,
+    поэтому JSON совпадает побайтно.
+    '''
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    fields = [
+        (field.field_name, compile_value(field, model))
+        for field in serializer._readable_fields
+    ]
+
+    def represent(instance):
+        ret = {}
+        for name, value_of in fields:
+            value = value_of(instance)
+            if value is not SKIP:
+                ret[name] = value
+        return ret
+
+    return represent
+
+
+class FastReadMixin:
+    '''Быстрый to_representation для сериализаторов на чтение.
+
+    Вместо обхода полей DRF на каждый объект используется функция,
+    скомпилированная при первом вызове, — для списка один раз на запрос.
+    Выключается настройкой ``FAST_READ_SERIALIZERS``.
+    '''
+    _fast_representation = None
+
+    def to_representation(self, instance):
+        if not settings.FAST_READ_SERIALIZERS:
+            return super().to_representation(instance)
+        if self._fast_representation is None:
+            self._fast_representation = compile_representation(self)
+        return self._fast_representation(instance)
@@ -1,6 +1,8 @@
 import datetime as dt
 
 from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import transaction
+from django.db.models import Q
 from django.db.utils import IntegrityError
 from rest_framework import serializers
 
@@ -15,11 +17,13 @@ from .constants import (
     USERNAME_MAX_LENGTH,
     EMAIL_MAX_LENGTH
 )
+from .metrics import TimedSerializerMixin
+from .representation import FastReadMixin
 
 from users.models import CustomUser
 
 
-class BaseUserSerializer(serializers.ModelSerializer):
+class BaseUserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = CustomUser
         fields = (
@@ -58,22 +62,36 @@ class RegistrationSerializer(serializers.ModelSerializer):
             })
         return value
 
-    def create(self, validated_data):
-        try:
-            user, _ = CustomUser.objects.get_or_create(**validated_data)
-        except IntegrityError:
-            error_mes = {}
-            user_with_username = CustomUser.objects.filter(
-                username__exact=validated_data.get('username'))
-            if user_with_username.exists():
+    def find_user(self, username, email):
+        '''Пользователь с этими данными; занятые имя и email — ошибка.
+
+        Совпадения по имени и по email ищутся одним запросом.
+        '''
+        error_mes = {}
+        for user in CustomUser.objects.filter(
+            Q(username__exact=username) | Q(email__exact=email)
+        ):
+            if user.username == username and user.email == email:
+                return user
+            if user.username == username:
                 error_mes.update(username=['Имя пользователя уже существует'])
-            user_with_email = CustomUser.objects.filter(
-                email__exact=validated_data.get('email'))
-            if user_with_email.exists():
+            if user.email == email:
                 error_mes.update(
                     email=['Пользователь с этим email уже существует'])
+        if error_mes:
             raise serializers.ValidationError(error_mes)
-        return user
+        return None
+
+    def create(self, validated_data):
+        user = self.find_user(**validated_data)
+        if user is not None:
+            return user
+        try:
+            with transaction.atomic():
+                return CustomUser.objects.create(**validated_data)
+        except IntegrityError:
+            # Пользователя успел создать параллельный запрос.
+            return self.find_user(**validated_data)
 
     class Meta:
         fields = ('username', 'email')
@@ -118,31 +136,39 @@ class TitlePostSerializer(serializers.ModelSerializer):
         return serializer.data
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(
+    TimedSerializerMixin, FastReadMixin, serializers.ModelSerializer
+):
 
     class Meta:
         model = Category
         fields = ('name', 'slug')
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(
+    TimedSerializerMixin, FastReadMixin, serializers.ModelSerializer
+):
 
     class Meta:
         model = Genre
         fields = ('name', 'slug')
 
 
-class TitleGetSerializer(serializers.ModelSerializer):
+class TitleGetSerializer(
+    TimedSerializerMixin, FastReadMixin, serializers.ModelSerializer
+):
     category = CategorySerializer(read_only=True, allow_null=True)
     genre = GenreSerializer(read_only=True, many=True)
     rating = serializers.IntegerField(read_only=True, default=0)
 
     class Meta:
-        fields = '__all__'
+        exclude = ('rating_sum', 'rating_count')
         model = Title
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(
+    TimedSerializerMixin, FastReadMixin, serializers.ModelSerializer
+):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True)
@@ -163,7 +189,9 @@ class ReviewSerializer(serializers.ModelSerializer):
         return data
 
 
-class CommentsSerializer(serializers.ModelSerializer):
+class CommentsSerializer(
+    TimedSerializerMixin, FastReadMixin, serializers.ModelSerializer
+):
     author = serializers.SlugRelatedField(slug_field='username',
                                           read_only=True)
 
@@ -0,0 +1,57 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Category, Comments, Genre, GenreTitle, Review, Title
+from users.models import CustomUser
+from .authentication import forget_user_state
+from .cache import invalidate
+from .facets import FACETS_GROUP
+from .suggest import SUGGEST_MODELS, on_deleted, on_saved
+
+INVALIDATED_GROUPS = {
+    Category: lambda obj: ('categories', 'titles', FACETS_GROUP),
+    Genre: lambda obj: ('genres', 'titles', FACETS_GROUP),
+    Title: lambda obj: ('titles', FACETS_GROUP),
+    GenreTitle: lambda obj: ('titles', FACETS_GROUP),
+    Review: lambda obj: ('titles', f'reviews:{obj.title_id}'),
+    Comments: lambda obj: (f'comments:{obj.review_id}',),
+}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_cached_responses(sender, instance, **kwargs):
+    get_groups = INVALIDATED_GROUPS.get(sender)
+    if get_groups:
+        invalidate(*get_groups(instance))
+
+
+@receiver(post_save)
+def update_suggest_index(sender, instance, **kwargs):
+    if sender in SUGGEST_MODELS:
+        on_saved(sender, instance)
+
+
+@receiver(post_delete)
+def remove_from_suggest_index(sender, instance, **kwargs):
+    if sender in SUGGEST_MODELS:
+        on_deleted(sender, instance)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate('titles', FACETS_GROUP)
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_authors(sender, created, **kwargs):
+    '''Имя автора выводится в отзывах и комментариях.'''
+    if not created:
+        invalidate('authors')
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def forget_authenticated_user(sender, instance, **kwargs):
+    forget_user_state(instance.pk)
@@ -0,0 +1,190 @@
+import logging
+import re
+import time
+from bisect import bisect_left, insort
+from threading import RLock, Thread
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from reviews.models import Category, Genre, Title
+from .cache import ALL_GROUPS, bump_versions, get_versions
+
+SUGGEST_GROUP = 'suggest'
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(text):
+    return ' '.join(re.findall(r'\w+', text.casefold().replace('ё', 'е')))
+
+
+def get_keys(name):
+    '''Ключи имени: само имя и его хвосты с начала каждого слова.'''
+    words = normalize(name).split(' ')
+    return {' '.join(words[idx:]) for idx in range(len(words)) if words[idx]}
+
+
+SUGGEST_MODELS = {
+    Title: ('title', 'id'),
+    Genre: ('genre', 'slug'),
+    Category: ('category', 'slug'),
+}
+
+
+def get_item(kind, key_field, key, name):
+    return {'type': kind, key_field: key, 'name': name}
+
+
+class SuggestIndex:
+    '''Префиксный индекс названий на отсортированном массиве.
+
+    Хранит кортежи (ключ, тип, pk) в порядке ключей, поэтому все ключи с
+    заданным префиксом лежат подряд и находятся бинарным поиском. Индекс
+    живёт в памяти процесса; изменения моделей применяются к нему сразу.
+    Версию групп ``suggest`` и ``all`` в общем кэше поиск сверяет не чаще
+    раза в ``SUGGEST_POLL_INTERVAL`` секунд. Если её сменил другой
+    процесс, индекс перестраивается в фоновом потоке, а поиск до конца
+    перестройки идёт по прежнему индексу; в запросе индекс строится только
+    в первый раз. Массовые загрузки без сигналов меняют версию через
+    ``invalidate_all``.
+    '''
+
+    def __init__(self):
+        self.entries = []
+        self.items = {}
+        self.version = None
+        self.checked_at = None
+        self.thread = None
+        self.lock = RLock()
+
+    def get_version(self):
+        return tuple(get_versions((ALL_GROUPS, SUGGEST_GROUP)))
+
+    def build(self, version):
+        '''Строит индекс по базе; version прочитана до чтения строк.'''
+        entries = []
+        items = {}
+        for model, (kind, key_field) in SUGGEST_MODELS.items():
+            rows = model.objects.values_list('pk', key_field, 'name')
+            for pk, key, name in rows.iterator():
+                items[(kind, pk)] = get_item(kind, key_field, key, name)
+                entries.extend(
+                    (name_key, kind, pk) for name_key in get_keys(name)
+                )
+        entries.sort()
+        with self.lock:
+            self.entries = entries
+            self.items = items
+            self.version = version
+
+    def build_in_background(self):
+        try:
+            self.build(self.get_version())
+        except Exception:
+            logger.exception('Failed to rebuild the suggest index')
+            with self.lock:
+                self.checked_at = None
+        finally:
+            connections.close_all()
+
+    def refresh(self):
+        now = time.monotonic()
+        with self.lock:
+            if self.version is not None and self.checked_at is not None and (
+                now - self.checked_at < settings.SUGGEST_POLL_INTERVAL
+            ):
+                return
+            self.checked_at = now
+        version = self.get_version()
+        if version == self.version:
+            return
+        if self.version is None or settings.SUGGEST_REBUILD_EAGER:
+            self.build(version)
+            return
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.thread = Thread(
+                target=self.build_in_background, name='suggest-index',
+                daemon=True
+            )
+            self.thread.start()
+
+    def add(self, kind, pk, item):
+        with self.lock:
+            self.remove(kind, pk)
+            self.items[(kind, pk)] = item
+            for key in get_keys(item['name']):
+                insort(self.entries, (key, kind, pk))
+
+    def remove(self, kind, pk):
+        with self.lock:
+            item = self.items.pop((kind, pk), None)
+            if item is None:
+                return
+            for key in get_keys(item['name']):
+                idx = bisect_left(self.entries, (key, kind, pk))
+                if idx < len(self.entries) and (
+                    self.entries[idx] == (key, kind, pk)
+                ):
+                    del self.entries[idx]
+
+    def apply(self, change):
+        '''Применяет изменение и публикует новую версию для процессов.
+
+        Новую версию индекс принимает, только если до неё была ровно та,
+        на которой он построен. Иначе между ними версию сменил другой
+        процесс, его изменение в индекс не попало, и индекс перестроится
+        при следующем поиске.
+        '''
+        version = bump_versions((SUGGEST_GROUP,))[SUGGEST_GROUP]
+        with self.lock:
+            if self.version is None:
+                return
+            change()
+            if int(version) == int(self.version[1]) + 1:
+                self.version = (self.version[0], version)
+            else:
+                self.checked_at = None
+
+    def lookup(self, query, limit):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        self.refresh()
+        results = []
+        seen = set()
+        with self.lock:
+            idx = bisect_left(self.entries, (prefix,))
+            while idx < len(self.entries) and len(results) < limit:
+                key, kind, pk = self.entries[idx]
+                if not key.startswith(prefix):
+                    break
+                if (kind, pk) not in seen:
+                    seen.add((kind, pk))
+                    results.append(self.items[(kind, pk)])
+                idx += 1
+        return results
+
+
+index = SuggestIndex()
+
+
+def on_saved(model, instance):
+    kind, key_field = SUGGEST_MODELS[model]
+    pk = instance.pk
+    item = get_item(
+        kind, key_field, getattr(instance, key_field), instance.name
+    )
+    transaction.on_commit(
+        lambda: index.apply(lambda: index.add(kind, pk, item))
+    )
+
+
+def on_deleted(model, instance):
+    kind, _ = SUGGEST_MODELS[model]
+    pk = instance.pk
+    transaction.on_commit(
+        lambda: index.apply(lambda: index.remove(kind, pk))
+    )
@@ -0,0 +1,57 @@
+from hashlib import md5
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    '''Ограничение частоты по алгоритму token bucket.
+
+    Частота задаётся как в DRF (``'5/hour'``): в корзине до 5 жетонов,
+    за час она наполняется заново, каждый запрос тратит один жетон. В
+    кэше хранится только пара (жетоны, время), а не история запросов.
+    '''
+    tokens = 0
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        now = self.timer()
+        tokens, updated = self.cache.get(self.key, (self.num_requests, now))
+        self.tokens = min(
+            self.num_requests,
+            tokens + (now - updated) * self.num_requests / self.duration
+        )
+        if self.tokens < 1:
+            return False
+        self.cache.set(self.key, (self.tokens - 1, now), self.duration)
+        return True
+
+    def wait(self):
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class SignupIPThrottle(TokenBucketThrottle):
+    scope = 'signup_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope, 'ident': self.get_ident(request)
+        }
+
+
+class SignupEmailThrottle(TokenBucketThrottle):
+    scope = 'signup_email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email')
+        if not isinstance(email, str) or not email:
+            return None
+        # Email ещё не проверен: в ключе кэша только его хэш, иначе
+        # длинный адрес или пробелы дают недопустимый для memcached ключ.
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': md5(email.strip().lower().encode()).hexdigest(),
+        }
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from .async_views import with_async_reads
 from .views import (
     CategoryViewSet,
     GenreViewSet,
@@ -9,7 +11,11 @@ from .views import (
     registration,
     get_token,
     ReviewViewSet,
-    CommentViewSet
+    CommentViewSet,
+    cache_stats,
+    export_table,
+    metrics,
+    suggest
 )
 
 router_v1 = DefaultRouter()
@@ -24,8 +30,18 @@ router_v1.register(
     r'titles/(?P<title_id>\d+)/reviews/(?P<review_id>\d+)/comments',
     CommentViewSet, basename='comments')
 
+router_urls = router_v1.urls
+if settings.ASYNC_READ_VIEWS:
+    router_urls = with_async_reads(
+        router_urls, (TitleViewSet, ReviewViewSet, CommentViewSet)
+    )
+
 urlpatterns = [
     path('v1/auth/signup/', registration, name='registration'),
     path('v1/auth/token/', get_token, name='get_token'),
-    path('v1/', include(router_v1.urls)),
+    path('v1/cache/stats/', cache_stats, name='cache_stats'),
+    path('v1/metrics/', metrics, name='metrics'),
+    path('v1/suggest/', suggest, name='suggest'),
+    path('v1/export/<str:filename>', export_table, name='export_table'),
+    path('v1/', include(router_urls)),
 ]
@@ -1,23 +1,46 @@
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import Count
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse
+)
 from django.shortcuts import get_object_or_404
 
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, status, viewsets, filters, mixins
-from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.decorators import (
+    action,
+    api_view,
+    permission_classes,
+    throttle_classes
+)
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 
-from api_yamdb.settings import EMAIL_SENDER
+from api_yamdb.settings import EMAIL_SENDER, SIGNUP_RESEND_WINDOW
+from .authentication import RoleAccessToken, load_full_user
+from .cache import (
+    CachedResponseMixin,
+    CachedRetrieveMixin,
+    get_cache,
+    get_stats
+)
+from .constants import SUGGEST_LIMIT, SUGGEST_MAX_LIMIT
+from .facets import FACETS_QUERY_PARAM, get_facets
 from .filters import TitleFilter
+from .mail import queue_mail
+from .metrics import get_metrics, render_prometheus
+from .pagination import NestedListPagination, TitlePagination
 from .permissions import (
     AnonReadOnlyOrIsAdminPermission,
     IsAdminPermission,
     ModerAdminAuthorPermission,
 )
+from .replicas import ReplicaReadMixin
 from .serializers import (
     BaseUserSerializer,
     CategorySerializer,
@@ -29,7 +52,16 @@ from .serializers import (
     TitlePostSerializer,
     TokenSerializer,
 )
-from reviews.models import Category, Genre, Review, Title
+from .suggest import index as suggest_index
+from .throttling import SignupEmailThrottle, SignupIPThrottle
+from reviews.dataset import (
+    EXPORT_FORMATS,
+    SOURCES_BY_NAME,
+    iter_export,
+    iter_gzip,
+    spool
+)
+from reviews.models import Category, Comments, Genre, Review, Title
 from users.models import CustomUser
 
 
@@ -45,27 +77,40 @@ class CreateListDestroyViewSet(
     lookup_field = 'slug'
 
 
-class BaseSlugViewSet(CreateListDestroyViewSet):
+class BaseSlugViewSet(ReplicaReadMixin, CachedResponseMixin,
+                      CreateListDestroyViewSet):
     permission_classes = (AnonReadOnlyOrIsAdminPermission,)
     lookup_field = 'slug'
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
 
-    def get_permissions(self):
-        if self.request.method in ['POST', 'PATCH', 'DELETE']:
-            return [IsAdminPermission()]
-        return [AllowAny()]
 
-
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ReplicaReadMixin, CachedRetrieveMixin,
+                    viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = (ModerAdminAuthorPermission,)
+    pagination_class = NestedListPagination
     http_method_names = ['get', 'post', 'delete', 'patch']
+    cache_group = 'reviews'
+    cache_responses = False
+
+    def get_cache_groups(self):
+        return (f'reviews:{self.kwargs.get("title_id")}', 'authors')
 
     def get_queryset(self):
-        title_id = self.kwargs.get('title_id')
-        title = self.get_title(title_id)
-        return title.reviews.all()
+        return Review.objects.filter(
+            title_id=self.kwargs.get('title_id')
+        ).select_related('author')
+
+    def get_list_count(self):
+        count = Title.objects.filter(
+            pk=self.kwargs.get('title_id')
+        ).annotate(count=Count('reviews')).values_list(
+            'count', flat=True
+        ).first()
+        if count is None:
+            raise Http404
+        return count
 
     def get_title(self, title_id):
         return get_object_or_404(Title, pk=title_id)
@@ -76,11 +121,17 @@ class ReviewViewSet(viewsets.ModelViewSet):
         serializer.save(author=self.request.user, title=title)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ReplicaReadMixin, CachedRetrieveMixin,
+                     viewsets.ModelViewSet):
     serializer_class = CommentsSerializer
     permission_classes = (ModerAdminAuthorPermission,)
-    pagination_class = PageNumberPagination
+    pagination_class = NestedListPagination
     http_method_names = ['get', 'post', 'delete', 'patch']
+    cache_group = 'comments'
+    cache_responses = False
+
+    def get_cache_groups(self):
+        return (f'comments:{self.kwargs.get("review_id")}', 'authors')
 
     def get_title(self, title_id):
         return get_object_or_404(Title, pk=title_id)
@@ -96,44 +147,76 @@ class CommentViewSet(viewsets.ModelViewSet):
         return review
 
     def get_queryset(self):
-        review = self.get_title_review()
-        return review.comments.all()
+        return Comments.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id')
+        ).select_related('author')
+
+    def get_list_count(self):
+        count = Review.objects.filter(
+            pk=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id')
+        ).annotate(count=Count('comments')).values_list(
+            'count', flat=True
+        ).first()
+        if count is None:
+            raise Http404
+        return count
 
     def perform_create(self, serializer):
         review = self.get_title_review()
         serializer.save(author=self.request.user, review=review)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ReplicaReadMixin, CachedRetrieveMixin,
+                   viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'patch', 'delete']
     permission_classes = (AnonReadOnlyOrIsAdminPermission,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
-
-    def get_permissions(self):
-        if self.request.method in ['POST', 'PATCH', 'DELETE']:
-            return [IsAdminPermission()]
-        return [AllowAny()]
+    pagination_class = TitlePagination
+    cache_group = 'titles'
 
     def get_queryset(self):
-        return Title.objects.annotate(
-            rating=Avg('reviews__score')
-        ).order_by('-rating')
+        return Title.objects.select_related('category').prefetch_related(
+            'genre'
+        ).order_by('-rating', '-id')
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if FACETS_QUERY_PARAM in self.request.query_params:
+            response.data['facets'] = get_facets(
+                self.filter_queryset(self.get_queryset()),
+                self.request
+            )
+        return response
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return TitleGetSerializer
         return TitlePostSerializer
 
+    # Произведение и его жанры сохраняются вместе, а версии кэша меняются
+    # один раз на коммит.
+    @transaction.atomic
+    def perform_create(self, serializer):
+        serializer.save()
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+
 
 class CategoryViewSet(BaseSlugViewSet):
     queryset = Category.objects.order_by('name')
     serializer_class = CategorySerializer
+    cache_group = 'categories'
 
 
 class GenreViewSet(BaseSlugViewSet):
     queryset = Genre.objects.order_by('name')
     serializer_class = GenreSerializer
+    cache_group = 'genres'
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -148,14 +231,14 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=False, permission_classes=(
             ModerAdminAuthorPermission, IsAuthenticated))
     def me(self, request):
-        serializer = self.get_serializer(request.user)
+        serializer = self.get_serializer(load_full_user(request.user))
         return Response(serializer.data)
 
     @me.mapping.patch
     @action(detail=False, methods=['patch'], url_path='me',
             permission_classes=(ModerAdminAuthorPermission,))
     def patch_self_info(self, request):
-        user = request.user
+        user = load_full_user(request.user)
         data = request.data.copy()
         if 'role' in data:
             data.pop('role')
@@ -165,14 +248,22 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+SIGNUP_MAIL_KEY = 'api:signup_mail:{user_id}'
+
+
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([SignupIPThrottle, SignupEmailThrottle])
 def registration(request):
     serializer = RegistrationSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     user = serializer.save()
+    if not get_cache().add(
+        SIGNUP_MAIL_KEY.format(user_id=user.pk), True, SIGNUP_RESEND_WINDOW
+    ):
+        return Response(serializer.data, status=status.HTTP_200_OK)
     confirmation_code = default_token_generator.make_token(user)
-    send_mail(
+    queue_mail(
         subject='Регистрация аккаунта',
         message=f'Код подтверждения: {confirmation_code}',
         from_email=EMAIL_SENDER,
@@ -195,10 +286,68 @@ def get_token(request):
     if default_token_generator.check_token(
         user, serializer.validated_data['confirmation_code']
     ):
-        refresh = RefreshToken.for_user(user)
         return Response(
-            {'token': str(refresh.access_token)},
+            {'token': str(RoleAccessToken.for_user(user))},
             status=status.HTTP_200_OK
         )
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminPermission])
+def cache_stats(request):
+    return Response(get_stats(), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminPermission])
+def metrics(request):
+    snapshot = get_metrics()
+    if request.query_params.get('format') == 'json':
+        return Response(snapshot, status=status.HTTP_200_OK)
+    return HttpResponse(
+        render_prometheus(snapshot),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def suggest(request):
+    '''Подсказки по началу слов в названиях произведений и словарей.'''
+    try:
+        limit = int(request.query_params.get('limit', SUGGEST_LIMIT))
+    except ValueError:
+        limit = SUGGEST_LIMIT
+    limit = min(max(limit, 1), SUGGEST_MAX_LIMIT)
+    results = suggest_index.lookup(request.query_params.get('q', ''), limit)
+    return Response({'results': results}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminPermission])
+def export_table(request, filename):
+    '''Потоковая выгрузка таблицы: <name>.csv, <name>.jsonl, +.gz.'''
+    name, _, extension = filename.partition('.')
+    compress = extension.endswith('.gz')
+    export_format = extension[:-len('.gz')] if compress else extension
+    if name not in SOURCES_BY_NAME or export_format not in EXPORT_FORMATS:
+        raise Http404
+    chunks = iter_export(SOURCES_BY_NAME[name], export_format)
+    if compress:
+        chunks = iter_gzip(chunks)
+        content_type = 'application/gzip'
+    elif export_format == 'csv':
+        content_type = 'text/csv'
+    else:
+        content_type = 'application/x-ndjson'
+    if isinstance(request._request, ASGIRequest):
+        # Django 3.2 перебирает потоковый ответ прямо в событийном цикле,
+        # где запросы к БД запрещены. Под ASGI выгрузка собирается здесь,
+        # в потоке view, и отдаётся из временного файла.
+        response = FileResponse(spool(chunks), content_type=content_type)
+    else:
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
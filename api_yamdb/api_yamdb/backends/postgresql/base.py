@@ -0,0 +1,32 @@
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    '''PostgreSQL с проверкой постоянных соединений перед использованием.
+
+    При ``CONN_MAX_AGE`` соединение переживает запрос, но могло быть
+    закрыто сервером или пулером. Если в настройках включён
+    ``CONN_HEALTH_CHECKS``, перед первым запросом к БД в каждом HTTP-запросе
+    соединение проверяется и при необходимости открывается заново.
+    '''
+    health_check_done = False
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and not self.health_check_done
+            and self.settings_dict.get('CONN_HEALTH_CHECKS')
+            and not self.in_atomic_block
+        ):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
@@ -0,0 +1,35 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    '''SQLite с WAL-журналом и немедленной блокировкой на запись.
+
+    Настройки берутся из OPTIONS: ``journal_mode`` (WAL по умолчанию),
+    ``synchronous`` и ``transaction_mode``. В режиме WAL читатели не ждут
+    писателя, а ``BEGIN IMMEDIATE`` берёт блокировку записи в начале
+    транзакции: конкурирующие писатели ждут ``timeout`` секунд вместо
+    ошибки «database is locked» при повышении блокировки посреди
+    транзакции.
+    '''
+    journal_mode = 'WAL'
+    synchronous = 'NORMAL'
+    transaction_mode = 'IMMEDIATE'
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.journal_mode = params.pop('journal_mode', self.journal_mode)
+        self.synchronous = params.pop('synchronous', self.synchronous)
+        self.transaction_mode = params.pop(
+            'transaction_mode', self.transaction_mode
+        )
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        if not self.is_in_memory_db():
+            connection.execute(f'PRAGMA journal_mode = {self.journal_mode}')
+            connection.execute(f'PRAGMA synchronous = {self.synchronous}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,59 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_read_database = ContextVar('read_database', default=None)
+
+
+def get_read_database():
+    '''Реплика, выбранная для чтения в текущем запросе, или None.'''
+    return _read_database.get()
+
+
+def read_from_replica():
+    '''Направляет чтения текущего контекста в случайную реплику.
+
+    Возвращает токен для ``stop_reading_from_replica`` или None, если
+    реплики не настроены.
+    '''
+    replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+    if not replicas:
+        return None
+    return _read_database.set(random.choice(replicas))
+
+
+def stop_reading_from_replica(token):
+    if token is not None:
+        _read_database.reset(token)
+
+
+@contextmanager
+def use_primary():
+    '''Временно возвращает чтения на основную базу.'''
+    token = _read_database.set(None)
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+class ReplicaRouter:
+    '''Чтения — в реплику, выбранную для запроса, остальное — в default.
+
+    Вне запросов, явно переведённых на реплику, все запросы идут в
+    основную базу, поэтому команды управления и миграции не меняются.
+    '''
+
+    def db_for_read(self, model, **hints):
+        return get_read_database()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -32,6 +32,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.querycheck.QueryCheckMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,13 +67,100 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 # Database
 
-DATABASES = {
+def env_flag(name, default):
+    return os.getenv(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite3')
+
+if DB_ENGINE == 'postgresql':
+    # DB_POOL=pgbouncer: соединения идут через PgBouncer в режиме
+    # transaction, где серверные курсоры между транзакциями недоступны.
+    DB_POOL = os.getenv('DB_POOL', '')
+    DATABASES = {
+        'default': {
+            'ENGINE': 'api_yamdb.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'api_yamdb'),
+            'USER': os.getenv('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': env_flag('DB_HEALTH_CHECKS', True),
+            'DISABLE_SERVER_SIDE_CURSORS': DB_POOL == 'pgbouncer',
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'api_yamdb.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'timeout': float(os.getenv('SQLITE_BUSY_TIMEOUT', 20)),
+                'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+                'transaction_mode': os.getenv(
+                    'SQLITE_TRANSACTION_MODE', 'IMMEDIATE'
+                ),
+            },
+        }
+    }
+
+# Реплики только для чтения: SQLITE_REPLICA_PATHS или DB_REPLICA_HOSTS
+# через запятую. В тестах реплики смотрят в тестовую базу default.
+if DB_ENGINE == 'postgresql':
+    REPLICA_SETTINGS = [
+        {'HOST': host} for host in os.getenv('DB_REPLICA_HOSTS', '').split(',')
+        if host
+    ]
+else:
+    REPLICA_SETTINGS = [
+        {'NAME': path}
+        for path in os.getenv('SQLITE_REPLICA_PATHS', '').split(',')
+        if path
+    ]
+DATABASE_REPLICAS = []
+for idx, replica in enumerate(REPLICA_SETTINGS, 1):
+    DATABASES[f'replica{idx}'] = {
+        **DATABASES['default'], **replica, 'TEST': {'MIRROR': 'default'}
+    }
+    DATABASE_REPLICAS.append(f'replica{idx}')
+
+DATABASE_ROUTERS = ['api_yamdb.routers.ReplicaRouter']
+
+# Сколько секунд после записи пользователь читает из основной базы:
+# должно превышать отставание реплик.
+REPLICA_LAG_SECONDS = float(os.getenv('DB_REPLICA_LAG', 5))
+
+# Асинхронные обёртки для чтения произведений, отзывов и комментариев;
+# включаются в asgi.py, под WSGI не нужны.
+ASYNC_READ_VIEWS = env_flag('ASYNC_READ_VIEWS', False)
+
+
+# Cache
+
+# Здесь хранятся версии групп кэша API: по ним строятся ETag и ключи
+# закэшированных ответов. LocMemCache свой у каждого процесса и годится
+# только для одного процесса; при нескольких воркерах нужен общий бэкенд,
+# например django.core.cache.backends.memcached.PyMemcacheCache.
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'api_yamdb'),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
     }
 }
 
+API_CACHE_ALIAS = 'default'
+
+# Индекс подсказок (api.suggest) сверяет версию с кэшем не чаще раза в
+# SUGGEST_POLL_INTERVAL секунд и перестраивается фоновым потоком; при
+# SUGGEST_REBUILD_EAGER — сразу в запросе, например в тестах.
+SUGGEST_POLL_INTERVAL = float(os.getenv('SUGGEST_POLL_INTERVAL', 1))
+SUGGEST_REBUILD_EAGER = env_flag('SUGGEST_REBUILD_EAGER', False)
+
 
 # Password validation
 
@@ -110,20 +199,63 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
     ),
+    'DEFAULT_THROTTLE_RATES': {
+        'signup_ip': '20/min',
+        'signup_email': '5/hour',
+    },
+    # Число доверенных прокси перед приложением. При 0 адрес клиента
+    # берётся из REMOTE_ADDR, а X-Forwarded-For, который подделывается
+    # клиентом, не учитывается.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
 }
 
+# Повторные запросы регистрации в течение окна не отправляют новое письмо:
+# код из первого письма остаётся действительным.
+SIGNUP_RESEND_WINDOW = int(os.getenv('SIGNUP_RESEND_WINDOW', 60))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=10),
     'AUTH_HEADER_TYPES': ('Bearer',)
 }
+
+# Метрики маршрутов API: время ответа, запросы к БД, сериализация.
+METRICS_ENABLED = env_flag('METRICS_ENABLED', True)
+METRICS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Сериализаторы на чтение строят ответ скомпилированной функцией вместо
+# обхода полей DRF; JSON тот же.
+FAST_READ_SERIALIZERS = env_flag('FAST_READ_SERIALIZERS', True)
+
+# Поиск N+1 и медленных запросов: off, log или raise (для тестов).
+QUERY_CHECK = os.getenv('QUERY_CHECK', 'off')
+QUERY_CHECK_THRESHOLD = int(os.getenv('QUERY_CHECK_THRESHOLD', 3))
+QUERY_CHECK_SLOW_MS = int(os.getenv('QUERY_CHECK_SLOW_MS', 100))
+
+# Проверка, что пользователь токена не удалён и не заблокирован. Роль и
+# активность кэшируются и сбрасываются при изменении пользователя; с
+# LocMemCache только в том воркере, где его изменили, в остальных старые
+# значения живут до JWT_REVOCATION_CACHE_TIMEOUT секунд.
+JWT_REVOCATION_CHECK = env_flag('JWT_REVOCATION_CHECK', True)
+JWT_REVOCATION_CACHE_TIMEOUT = int(
+    os.getenv('JWT_REVOCATION_CACHE_TIMEOUT', 60)
+)
 AUTH_USER_MODEL = 'users.CustomUser'
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Очередь писем (api.mail): отправка фоновым потоком пачками.
+EMAIL_QUEUE_EAGER = env_flag('EMAIL_QUEUE_EAGER', False)
+EMAIL_QUEUE_BATCH_SIZE = 50
+EMAIL_QUEUE_IDLE_TIMEOUT = 30
+EMAIL_QUEUE_RETRY_DELAY = 2
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+
 DOMAIN_NAME = 'yamdb.ru'
 
 EMAIL_SENDER = f'signup@{DOMAIN_NAME}'
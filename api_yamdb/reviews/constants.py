@@ -2,3 +2,4 @@ NAME_MAX_LENGTH = 256
 SLUG_MAX_LENGTH = 50
 MIN = 1
 MAX = 10
+SEARCH_CONFIG = 'russian'
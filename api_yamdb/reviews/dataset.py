@@ -0,0 +1,115 @@
+import csv
+import gzip
+import io
+import json
+import tempfile
+from collections import namedtuple
+from datetime import date
+
+from users.models import CustomUser
+from .models import Category, Comments, Genre, GenreTitle, Review, Title
+
+CHUNK_SIZE = 2000
+GZIP_FLUSH_SIZE = 64 * 1024
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+CsvSource = namedtuple('CsvSource', ('filename', 'model', 'columns'))
+
+SOURCES = (
+    CsvSource('category.csv', Category, {
+        'id': 'id', 'name': 'name', 'slug': 'slug',
+    }),
+    CsvSource('genre.csv', Genre, {
+        'id': 'id', 'name': 'name', 'slug': 'slug',
+    }),
+    CsvSource('titles.csv', Title, {
+        'id': 'id', 'name': 'name', 'year': 'year', 'category': 'category_id',
+    }),
+    CsvSource('users.csv', CustomUser, {
+        'id': 'id', 'username': 'username', 'email': 'email', 'role': 'role',
+        'bio': 'bio', 'first_name': 'first_name', 'last_name': 'last_name',
+    }),
+    CsvSource('review.csv', Review, {
+        'id': 'id', 'title_id': 'title_id', 'text': 'text',
+        'author': 'author_id', 'score': 'score', 'pub_date': 'pub_date',
+    }),
+    CsvSource('comments.csv', Comments, {
+        'id': 'id', 'review_id': 'review_id', 'text': 'text',
+        'author': 'author_id', 'pub_date': 'pub_date',
+    }),
+    CsvSource('genre_title.csv', GenreTitle, {
+        'id': 'id', 'title_id': 'title_id', 'genre_id': 'genre_id',
+    }),
+)
+
+SOURCES_BY_NAME = {
+    source.filename.rsplit('.', 1)[0]: source for source in SOURCES
+}
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+
+class Echo:
+    '''Псевдофайл для csv.writer, возвращающий записанную строку.'''
+
+    def write(self, value):
+        return value
+
+
+def format_value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def export_rows(source, chunk_size=CHUNK_SIZE):
+    '''Строки таблицы в порядке ключа через серверный курсор.'''
+    return source.model.objects.order_by('pk').values_list(
+        *source.columns.values()
+    ).iterator(chunk_size=chunk_size)
+
+
+def iter_csv(source, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(Echo())
+    yield writer.writerow(source.columns)
+    for row in export_rows(source, chunk_size):
+        yield writer.writerow([format_value(value) for value in row])
+
+
+def iter_jsonl(source, chunk_size=CHUNK_SIZE):
+    columns = list(source.columns)
+    for row in export_rows(source, chunk_size):
+        yield json.dumps(
+            dict(zip(columns, map(format_value, row))), ensure_ascii=False
+        ) + '\n'
+
+
+def iter_export(source, export_format='csv', chunk_size=CHUNK_SIZE):
+    if export_format == 'jsonl':
+        return iter_jsonl(source, chunk_size)
+    return iter_csv(source, chunk_size)
+
+
+def iter_gzip(chunks):
+    '''Сжимает поток строк на лету, отдавая блоки по мере накопления.'''
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as archive:
+        for chunk in chunks:
+            archive.write(chunk.encode())
+            if buffer.tell() >= GZIP_FLUSH_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+    yield buffer.getvalue()
+
+
+def spool(chunks):
+    '''Записывает поток во временный файл и возвращает его с начала.
+
+    Файл держится в памяти до ``SPOOL_MAX_SIZE`` байт, дальше — на диске.
+    '''
+    file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    for chunk in chunks:
+        file.write(chunk.encode() if isinstance(chunk, str) else chunk)
+    file.seek(0)
+    return file
@@ -0,0 +1,387 @@
+import csv
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    wait
+)
+from itertools import islice
+from multiprocessing import get_context
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import CommandError
+from django.db import DataError, IntegrityError, connections, transaction
+
+BATCH_SIZE = 1000
+CHUNK_SIZE = 10000
+
+IGNORE = 'ignore'
+UPSERT = 'upsert'
+ERROR = 'error'
+CONFLICT_MODES = (IGNORE, UPSERT, ERROR)
+
+ChunkResult = namedtuple(
+    'ChunkResult',
+    ('filename', 'first', 'last', 'loaded', 'skipped', 'rejected')
+)
+
+
+def read_rows(path, start=0):
+    '''Нумерованные записи CSV, начиная с записи ``start + 1``.'''
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        yield from islice(enumerate(csv.DictReader(file), 1), start, None)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+def get_fields(source):
+    return {
+        column: source.model._meta.get_field(name)
+        for column, name in source.columns.items()
+    }
+
+
+def coerce_row(fields, row):
+    '''Приводит строковые значения записи к типам полей модели.'''
+    if None in row:
+        raise ValidationError('too many values')
+    values = {}
+    for column, field in fields.items():
+        if row.get(column) is None:
+            raise ValidationError(f'missing column {column}')
+        value = row[column]
+        if value == '' and not field.empty_strings_allowed:
+            value = None
+        try:
+            values[field.attname] = field.to_python(value)
+        except ValidationError as error:
+            raise ValidationError(f'{column}: {"; ".join(error.messages)}')
+    return values
+
+
+def reject_missing_parents(fields, records, rejected):
+    '''Отсеивает записи со ссылками на несуществующие объекты.
+
+    Для каждого внешнего ключа выполняется один запрос на всю пачку.
+    '''
+    for field in fields.values():
+        if not field.is_relation:
+            continue
+        ids = {
+            values[field.attname] for _, _, values in records
+            if values[field.attname] is not None
+        }
+        found = set(field.related_model.objects.filter(
+            pk__in=ids
+        ).values_list('pk', flat=True))
+        valid = []
+        for number, row, values in records:
+            parent = values[field.attname]
+            if parent is None or parent in found:
+                valid.append((number, row, values))
+            else:
+                rejected.append(
+                    (number, row, f'{field.name} {parent} does not exist')
+                )
+        records = valid
+    return records
+
+
+def save_objects(records, save_all, save_one, rejected):
+    '''Сохраняет пачку целиком, а при ошибке — по одной записи.'''
+    if not records:
+        return 0
+    try:
+        with transaction.atomic():
+            save_all([obj for _, _, obj in records])
+        return len(records)
+    except (DataError, IntegrityError):
+        pass
+    saved = 0
+    for number, row, obj in records:
+        try:
+            with transaction.atomic():
+                save_one(obj)
+            saved += 1
+        except (DataError, IntegrityError) as error:
+            rejected.append((number, row, str(error)))
+    return saved
+
+
+def save_batch(source, records, conflicts):
+    '''Загружает пачку записей CSV и возвращает (loaded, skipped, rejected).
+
+    Уже загруженные ключи определяются одним запросом на пачку; ошибочные
+    записи не прерывают загрузку, а попадают в список отклонённых.
+    '''
+    model = source.model
+    fields = get_fields(source)
+    rejected = []
+    valid = []
+    for number, row in records:
+        try:
+            valid.append((number, row, coerce_row(fields, row)))
+        except ValidationError as error:
+            rejected.append((number, row, '; '.join(error.messages)))
+    valid = reject_missing_parents(fields, valid, rejected)
+
+    pk_name = model._meta.pk.attname
+    existing = set(model.objects.filter(
+        pk__in=[values[pk_name] for _, _, values in valid]
+    ).values_list('pk', flat=True))
+    new, old = [], []
+    for number, row, values in valid:
+        record = (number, row, model(**values))
+        (old if values[pk_name] in existing else new).append(record)
+
+    skipped = 0
+    loaded = save_objects(
+        new,
+        model.objects.bulk_create,
+        lambda obj: obj.save(force_insert=True),
+        rejected,
+    )
+    if conflicts == UPSERT:
+        update_fields = [
+            field.attname for field in fields.values()
+            if field.attname != pk_name
+        ]
+        loaded += save_objects(
+            old,
+            lambda objs: model.objects.bulk_update(objs, update_fields),
+            lambda obj: obj.save(update_fields=update_fields),
+            rejected,
+        )
+    elif conflicts == IGNORE:
+        skipped = len(old)
+    else:
+        rejected.extend(
+            (number, row, f'{pk_name} already exists')
+            for number, row, _ in old
+        )
+    return loaded, skipped, sorted(rejected, key=lambda reject: reject[0])
+
+
+def load_chunk(source, records, batch_size, conflicts):
+    '''Загружает часть файла; каждая пачка — в своей транзакции.'''
+    loaded = skipped = 0
+    rejected = []
+    for batch in batched(records, batch_size):
+        with transaction.atomic():
+            batch_loaded, batch_skipped, batch_rejected = save_batch(
+                source, batch, conflicts
+            )
+        loaded += batch_loaded
+        skipped += batch_skipped
+        rejected.extend(batch_rejected)
+    return ChunkResult(
+        source.filename, records[0][0], records[-1][0],
+        loaded, skipped, rejected
+    )
+
+
+def get_dependencies(sources):
+    '''Файлы, на модели которых ссылаются внешние ключи каждого файла.'''
+    by_model = {source.model: source.filename for source in sources}
+    return {
+        source.filename: {
+            by_model[field.related_model]
+            for field in get_fields(source).values()
+            if field.is_relation
+            and field.related_model in by_model
+            and field.related_model is not source.model
+        }
+        for source in sources
+    }
+
+
+def dependency_levels(sources):
+    '''Топологически упорядоченные уровни файлов.
+
+    Файлы одного уровня не зависят друг от друга и могут загружаться
+    одновременно.
+    '''
+    dependencies = get_dependencies(sources)
+    loaded = set()
+    levels = []
+    pending = list(sources)
+    while pending:
+        level = [
+            source for source in pending
+            if dependencies[source.filename] <= loaded
+        ]
+        if not level:
+            raise ValueError(
+                'Циклическая зависимость между файлами: '
+                + ', '.join(source.filename for source in pending)
+            )
+        levels.append(level)
+        loaded.update(source.filename for source in level)
+        pending = [source for source in pending if source not in level]
+    return levels
+
+
+class Checkpoints:
+    '''Номер последней загруженной записи каждого файла.
+
+    Контрольная точка сбрасывается, если размер или время изменения файла
+    отличаются от сохранённых, то есть файл заменили между запусками.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                self.state = json.load(file)
+
+    def signature(self, source_path):
+        stat = os.stat(source_path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def get(self, source_path):
+        entry = self.state.get(os.path.basename(source_path))
+        if entry and entry['signature'] == self.signature(source_path):
+            return entry['row']
+        return 0
+
+    def set(self, source_path, row):
+        if not self.path:
+            return
+        self.state[os.path.basename(source_path)] = {
+            'row': row, 'signature': self.signature(source_path)
+        }
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.state, file)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        self.state = {}
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class RejectLog:
+    '''CSV-файл отклонённых записей: файл, номер записи, причина, данные.'''
+    header = ('file', 'row', 'reason', 'data')
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+
+    def write(self, filename, rejected):
+        self.count += len(rejected)
+        if not rejected or not self.path:
+            return
+        is_new = not os.path.exists(self.path)
+        with open(self.path, 'a', encoding='utf-8', newline='') as file:
+            writer = csv.writer(file)
+            if is_new:
+                writer.writerow(self.header)
+            for number, row, reason in rejected:
+                writer.writerow((
+                    filename, number, reason,
+                    json.dumps(row, ensure_ascii=False)
+                ))
+
+
+class Importer:
+    '''Загрузка набора CSV с контрольными точками и журналом отказов.'''
+
+    def __init__(self, data_dir, batch_size=BATCH_SIZE, conflicts=IGNORE,
+                 checkpoints=None, rejects=None, progress=None):
+        self.data_dir = data_dir
+        self.batch_size = batch_size
+        self.conflicts = conflicts
+        self.checkpoints = checkpoints or Checkpoints(None)
+        self.rejects = rejects or RejectLog(None)
+        self.progress = progress
+
+    def get_path(self, filename):
+        return os.path.join(self.data_dir, filename)
+
+    def handle_result(self, result):
+        self.rejects.write(result.filename, result.rejected)
+        if self.progress:
+            self.progress(result)
+
+    def load_sequential(self, sources):
+        for level in dependency_levels(sources):
+            for source in level:
+                path = self.get_path(source.filename)
+                start = self.checkpoints.get(path)
+                for records in batched(read_rows(path, start),
+                                       self.batch_size):
+                    result = load_chunk(
+                        source, records, self.batch_size, self.conflicts
+                    )
+                    self.checkpoints.set(path, result.last)
+                    self.handle_result(result)
+        self.checkpoints.clear()
+
+    def load_parallel(self, sources, workers, chunk_size=CHUNK_SIZE):
+        '''Загружает независимые файлы и их части в пуле процессов.
+
+        Уровни зависимостей загружаются по очереди; у каждого процесса своё
+        соединение с БД. В очереди держится не больше двух частей на
+        процесс, так что память не зависит от размера файлов. Контрольная
+        точка файла сдвигается только по непрерывно загруженным частям,
+        поэтому после ошибки в части загрузка продолжается с неё.
+        '''
+        connections.close_all()
+        context = get_context('fork')
+        with ProcessPoolExecutor(workers, mp_context=context) as pool:
+            for level in dependency_levels(sources):
+                resume_at = {}
+                done = {}
+                pending = {}
+                for source in level:
+                    path = self.get_path(source.filename)
+                    resume_at[source.filename] = self.checkpoints.get(path)
+                    done[source.filename] = {}
+                    for records in batched(
+                        read_rows(path, resume_at[source.filename]),
+                        chunk_size
+                    ):
+                        if len(pending) >= workers * 2:
+                            finished, _ = wait(
+                                pending, return_when=FIRST_COMPLETED
+                            )
+                            self.collect(finished, pending, resume_at, done)
+                        future = pool.submit(
+                            load_chunk, source, records,
+                            self.batch_size, self.conflicts
+                        )
+                        pending[future] = (
+                            source.filename, records[0][0], records[-1][0]
+                        )
+                self.collect(wait(pending)[0], pending, resume_at, done)
+        self.checkpoints.clear()
+
+    def collect(self, futures, pending, resume_at, done):
+        for future in futures:
+            filename, first, last = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as error:
+                raise CommandError(
+                    f'{filename}: rows {first}-{last} failed: {error!r}'
+                ) from error
+            chunks = done[result.filename]
+            chunks[result.first] = result.last
+            row = resume_at[result.filename]
+            while row + 1 in chunks:
+                row = chunks.pop(row + 1)
+            if row != resume_at[result.filename]:
+                resume_at[result.filename] = row
+                self.checkpoints.set(self.get_path(result.filename), row)
+            self.handle_result(result)
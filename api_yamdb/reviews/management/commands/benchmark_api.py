@@ -0,0 +1,277 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+from uuid import uuid4
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+
+from api.cache import get_cache
+from reviews.models import Review, Title
+from users.models import CustomUser
+
+SCENARIOS = ('titles', 'reviews', 'comments', 'signup', 'token')
+TOKEN_USERNAME = 'benchmark-token-user'
+SIGNUP_PREFIX = 'benchmark-signup-'
+COMPARED = ('p50', 'p95', 'p99', 'rps', 'queries')
+
+
+def percentile(timings, share):
+    '''Значение по рангу из отсортированного списка.'''
+    return timings[min(int(len(timings) * share), len(timings) - 1)]
+
+
+class QueryCounter:
+    '''Считает запросы ко всем базам через execute_wrapper.'''
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.stack = ExitStack()
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stack.close()
+
+
+class LocalClient:
+    '''Запросы через тестовый клиент Django в этом процессе.'''
+    counts_queries = True
+
+    def __init__(self, cold):
+        self.client = Client()
+        self.cold = cold
+
+    def request(self, method, path, data, index):
+        if self.cold:
+            get_cache().clear()
+        # Свой адрес на каждый запрос, чтобы регистрацию не ограничивал
+        # лимит на IP.
+        address = f'10.{index // 62500 % 256}.{index // 250 % 250}.' \
+                  f'{index % 250 + 1}'
+        with QueryCounter() as counter:
+            response = getattr(self.client, method)(
+                path, data, REMOTE_ADDR=address
+            )
+        return response.status_code, counter.count
+
+
+class RemoteClient:
+    '''Запросы к запущенному серверу по HTTP.'''
+    counts_queries = False
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+
+    def request(self, method, path, data, index):
+        body = None
+        if method == 'get':
+            if data:
+                path = f'{path}?{urlencode(data)}'
+        else:
+            body = urlencode(data).encode()
+        request = Request(f'{self.url}{path}', data=body)
+        try:
+            with urlopen(request) as response:
+                response.read()
+                return response.status, None
+        except HTTPError as error:
+            return error.code, None
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark API endpoints on the current data and compare with a '
+        'stored baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS,
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Measured requests per scenario',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=10,
+            help='Unmeasured requests per scenario',
+        )
+        parser.add_argument(
+            '--url',
+            help='Base URL of a running server, e.g. http://127.0.0.1:8000; '
+                 'by default requests go through the Django test client',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=1,
+            help='Parallel clients, only with --url',
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Clear the cache before every request (test client only)',
+        )
+        parser.add_argument('--save', help='Write results as JSON')
+        parser.add_argument('--baseline', help='JSON results to compare with')
+        parser.add_argument(
+            '--max-regression', type=float,
+            help='Fail if p95 of any scenario grows by more percent '
+                 'than this against --baseline',
+        )
+
+    def handle(self, *args, **options):
+        if options['url']:
+            client = RemoteClient(options['url'])
+        else:
+            if options['concurrency'] != 1:
+                raise CommandError('--concurrency needs --url')
+            client = LocalClient(options['cold'])
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)
+        requests = self.get_requests()
+        results = {}
+        # Письма регистрации никуда не отправляются.
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.dummy.EmailBackend'
+        ):
+            try:
+                for name in options['scenarios']:
+                    results[name] = self.run(
+                        client, requests[name], options['warmup'],
+                        options['requests'], options['concurrency']
+                    )
+            finally:
+                CustomUser.objects.filter(
+                    username__startswith=SIGNUP_PREFIX
+                ).delete()
+        self.report(results, baseline)
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, indent=2)
+        if baseline and options['max_regression'] is not None:
+            self.check_regression(
+                results, baseline, options['max_regression']
+            )
+
+    def get_requests(self):
+        '''Для каждого сценария — функция номера запроса в запрос.'''
+        title = Title.objects.order_by('-rating_count', 'pk').first()
+        review = Review.objects.annotate(
+            comment_count=Count('comments')
+        ).order_by('-comment_count', 'pk').first()
+        if title is None or review is None:
+            raise CommandError(
+                'No titles or reviews, run generate_catalog first'
+            )
+        pages = max(Title.objects.count() // 10, 1)
+        user, _ = CustomUser.objects.get_or_create(
+            username=TOKEN_USERNAME,
+            defaults={'email': f'{TOKEN_USERNAME}@benchmark.local'},
+        )
+        code = default_token_generator.make_token(user)
+        run_id = uuid4().hex[:8]
+        return {
+            'titles': lambda index: (
+                'get', '/api/v1/titles/', {'page': index % pages + 1}
+            ),
+            'reviews': lambda index: (
+                'get', f'/api/v1/titles/{title.pk}/reviews/', {}
+            ),
+            'comments': lambda index: (
+                'get',
+                f'/api/v1/titles/{review.title_id}/reviews/{review.pk}/'
+                f'comments/',
+                {}
+            ),
+            'signup': lambda index: ('post', '/api/v1/auth/signup/', {
+                'username': f'{SIGNUP_PREFIX}{run_id}-{index}',
+                'email': f'{SIGNUP_PREFIX}{run_id}-{index}@benchmark.local',
+            }),
+            'token': lambda index: ('post', '/api/v1/auth/token/', {
+                'username': TOKEN_USERNAME, 'confirmation_code': code,
+            }),
+        }
+
+    def run(self, client, make_request, warmup, count, concurrency):
+        def measure(index):
+            method, path, data = make_request(index)
+            begin = time.perf_counter()
+            status, queries = client.request(method, path, data, index)
+            return time.perf_counter() - begin, status, queries
+
+        for index in range(warmup):
+            measure(count + index)
+        started = time.perf_counter()
+        if concurrency > 1:
+            with ThreadPoolExecutor(concurrency) as pool:
+                samples = list(pool.map(measure, range(count)))
+        else:
+            samples = [measure(index) for index in range(count)]
+        elapsed = time.perf_counter() - started
+        timings = sorted(timing for timing, _, _ in samples)
+        queries = [value for _, _, value in samples if value is not None]
+        return {
+            'requests': count,
+            'errors': sum(status >= 400 for _, status, _ in samples),
+            'p50': percentile(timings, 0.5) * 1000,
+            'p95': percentile(timings, 0.95) * 1000,
+            'p99': percentile(timings, 0.99) * 1000,
+            'rps': count / elapsed,
+            'queries': sum(queries) / len(queries) if queries else None,
+        }
+
+    def report(self, results, baseline):
+        self.stdout.write(
+            f'{"scenario":<10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}'
+            f'{"req/s":>10}{"queries":>10}{"errors":>8}'
+        )
+        for name, result in results.items():
+            queries = result['queries']
+            self.stdout.write(
+                f'{name:<10}{result["p50"]:>10.2f}{result["p95"]:>10.2f}'
+                f'{result["p99"]:>10.2f}{result["rps"]:>10.1f}'
+                f'{"-" if queries is None else f"{queries:.1f}":>10}'
+                f'{result["errors"]:>8}'
+            )
+            old = (baseline or {}).get(name)
+            if old:
+                self.stdout.write(' ' * 10 + ''.join(
+                    f'{self.change(result[key], old.get(key)):>10}'
+                    for key in COMPARED
+                ))
+
+    def change(self, value, old):
+        if value is None or not old:
+            return '-'
+        return f'{(value - old) / old * 100:+.1f}%'
+
+    def check_regression(self, results, baseline, limit):
+        regressions = [
+            f'{name} p95 {baseline[name]["p95"]:.2f} -> '
+            f'{result["p95"]:.2f} ms'
+            for name, result in results.items()
+            if name in baseline and baseline[name]['p95']
+            and (result['p95'] - baseline[name]['p95'])
+            / baseline[name]['p95'] * 100 > limit
+        ]
+        if regressions:
+            raise CommandError(
+                f'p95 regressed by more than {limit}%: '
+                + '; '.join(regressions)
+            )
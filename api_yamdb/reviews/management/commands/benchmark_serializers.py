@@ -0,0 +1,98 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from api.serializers import (
+    CategorySerializer,
+    CommentsSerializer,
+    GenreSerializer,
+    ReviewSerializer,
+    TitleGetSerializer
+)
+from reviews.models import Category, Comments, Genre, Review, Title
+
+SERIALIZERS = {
+    'titles': (
+        TitleGetSerializer,
+        lambda: Title.objects.select_related('category').prefetch_related(
+            'genre'
+        ).order_by('-rating', '-id'),
+    ),
+    'reviews': (
+        ReviewSerializer,
+        lambda: Review.objects.select_related('author').order_by('pk'),
+    ),
+    'comments': (
+        CommentsSerializer,
+        lambda: Comments.objects.select_related('author').order_by('pk'),
+    ),
+    'categories': (CategorySerializer, lambda: Category.objects.all()),
+    'genres': (GenreSerializer, lambda: Genre.objects.all()),
+}
+
+
+def serialize(serializer_class, objects, fast):
+    with override_settings(FAST_READ_SERIALIZERS=fast):
+        return JSONRenderer().render(
+            serializer_class(objects, many=True).data
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare CPU cost per item of the DRF and the compiled '
+        'representation of read serializers'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--serializers', nargs='+', choices=SERIALIZERS,
+            default=list(SERIALIZERS),
+        )
+        parser.add_argument(
+            '--items', type=int, default=500,
+            help='Objects loaded per serializer',
+        )
+        parser.add_argument(
+            '--rounds', type=int, default=20,
+            help='Serializations per mode, the best one is reported',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"serializer":<12}{"items":>8}{"drf µs":>10}{"fast µs":>10}'
+            f'{"speedup":>10}'
+        )
+        for name in options['serializers']:
+            serializer_class, get_queryset = SERIALIZERS[name]
+            # Объекты загружаются заранее: меряется только сериализация.
+            objects = list(get_queryset()[:options['items']])
+            if not objects:
+                self.stdout.write(f'{name:<12}{0:>8}{"-":>10}{"-":>10}')
+                continue
+            if serialize(serializer_class, objects, False) != serialize(
+                serializer_class, objects, True
+            ):
+                raise CommandError(f'{name}: fast representation differs')
+            drf, fast = (
+                self.measure(
+                    serializer_class, objects, mode, options['rounds']
+                ) / len(objects) * 10 ** 6
+                for mode in (False, True)
+            )
+            self.stdout.write(
+                f'{name:<12}{len(objects):>8}{drf:>10.1f}{fast:>10.1f}'
+                f'{drf / fast:>9.1f}x'
+            )
+
+    def measure(self, serializer_class, objects, fast, rounds):
+        best = None
+        with override_settings(FAST_READ_SERIALIZERS=fast):
+            for _ in range(max(rounds, 1)):
+                started = time.perf_counter()
+                serializer_class(objects, many=True).data
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+        return best
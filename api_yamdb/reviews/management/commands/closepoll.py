@@ -1,108 +1,116 @@
-import csv
 import os
+from collections import Counter as Totals
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
-from progress.bar import IncrementalBar
-from reviews.models import Category, Comments, Genre, GenreTitle, Review, Title
-from users.models import CustomUser
-
-
-def category_create(row):
-    Category.objects.get_or_create(
-        id=row[0],
-        name=row[1],
-        slug=row[2],
-    )
-
-
-def genre_create(row):
-    Genre.objects.get_or_create(
-        id=row[0],
-        name=row[1],
-        slug=row[2],
-    )
-
-
-def titles_create(row):
-    Title.objects.get_or_create(
-        id=row[0],
-        name=row[1],
-        year=row[2],
-        category_id=row[3],
-    )
-
-
-def users_create(row):
-    CustomUser.objects.get_or_create(
-        id=row[0],
-        username=row[1],
-        email=row[2],
-        role=row[3],
-        bio=row[4],
-        first_name=row[5],
-        last_name=row[6],
-    )
-
-
-def review_create(row):
-    title, _ = Title.objects.get_or_create(id=row[1])
-    Review.objects.get_or_create(
-        id=row[0],
-        title=title,
-        text=row[2],
-        author_id=row[3],
-        score=row[4],
-        pub_date=row[5]
-    )
-
-
-def comment_create(row):
-    review, _ = Review.objects.get_or_create(id=row[1])
-    Comments.objects.get_or_create(
-        id=row[0],
-        review=review,
-        text=row[2],
-        author_id=row[3],
-        pub_date=row[4],
-    )
-
-
-def genre_title_create(row):
-    title, _ = Title.objects.get_or_create(id=row[1])
-    genre, _ = Genre.objects.get_or_create(id=row[2])
-    GenreTitle.objects.get_or_create(
-        id=row[0],
-        title=title,
-        genre=genre,
-    )
-
-
-action = {
-    'category.csv': category_create,
-    'genre.csv': genre_create,
-    'titles.csv': titles_create,
-    'users.csv': users_create,
-    'review.csv': review_create,
-    'comments.csv': comment_create,
-    'genre_title.csv': genre_title_create
-}
+from django.db import connection
+from progress.counter import Counter
+
+from api.cache import invalidate_all
+from reviews.dataset import SOURCES
+from reviews.models import Title
+from ._private import (
+    BATCH_SIZE,
+    CHUNK_SIZE,
+    CONFLICT_MODES,
+    IGNORE,
+    Checkpoints,
+    Importer,
+    RejectLog
+)
 
 
 class Command(BaseCommand):
     help = "Load csv in DB"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-dir',
+            default=os.path.join(settings.BASE_DIR, 'static/data/'),
+            help='Directory with the csv files',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Rows per bulk insert',
+        )
+        parser.add_argument(
+            '--conflicts', choices=CONFLICT_MODES, default=IGNORE,
+            help='What to do with rows whose keys already exist',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Worker processes for independent files and chunks',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Rows per worker task when --workers > 1',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=os.path.join(settings.BASE_DIR, 'import_checkpoint.json'),
+            help='File with per-csv progress used to resume a failed run',
+        )
+        parser.add_argument(
+            '--rejects',
+            default=os.path.join(settings.BASE_DIR, 'import_rejects.csv'),
+            help='File to append rejected rows and reasons to',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Ignore the checkpoint and load every file from the start',
+        )
+
     def handle(self, *args, **options):
-        for filename, row in action.items():
-            path = os.path.join(settings.BASE_DIR, "static/data/") + filename
-            with open(path, 'r', encoding='utf-8') as file:
-                row_count = sum(1 for row in file)
-            with open(path, 'r', encoding='utf-8') as file:
-                reader = csv.reader(file)
-                bar = IncrementalBar(filename.ljust(17), max=row_count)
-                next(reader)
-                for row in reader:
-                    bar.next()
-                    action[filename](row)
-                bar.finish()
+        checkpoints = Checkpoints(options['checkpoint'])
+        if options['restart']:
+            checkpoints.clear()
+        self.totals = {}
+        self.counters = {}
+        importer = Importer(
+            options['data_dir'],
+            batch_size=options['batch_size'],
+            conflicts=options['conflicts'],
+            checkpoints=checkpoints,
+            rejects=RejectLog(options['rejects']),
+            progress=self.report,
+        )
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stderr.write(
+                'SQLite allows a single writer, loading sequentially'
+            )
+            workers = 1
+        if workers > 1:
+            importer.load_parallel(SOURCES, workers, options['chunk_size'])
+        else:
+            importer.load_sequential(SOURCES)
+        for counter in self.counters.values():
+            counter.finish()
+        Title.objects.rebuild_ratings()
+        invalidate_all()
+        for filename, totals in self.totals.items():
+            self.stdout.write(
+                f'{filename.ljust(17)} loaded {totals["loaded"]}, '
+                f'skipped {totals["skipped"]}, '
+                f'rejected {totals["rejected"]}'
+            )
+        if importer.rejects.count:
+            self.stdout.write(
+                f'{importer.rejects.count} rows rejected, '
+                f'see {options["rejects"]}'
+            )
         self.stdout.write("The database has been loaded successfully")
+
+    def report(self, result):
+        if result.filename not in self.counters:
+            for counter in self.counters.values():
+                counter.finish()
+            self.counters[result.filename] = Counter(
+                f'{result.filename.ljust(17)} '
+            )
+        self.counters[result.filename].next(result.last - result.first + 1)
+        self.totals.setdefault(result.filename, Totals()).update(
+            loaded=result.loaded,
+            skipped=result.skipped,
+            rejected=len(result.rejected),
+        )
@@ -0,0 +1,60 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.dataset import (
+    CHUNK_SIZE,
+    EXPORT_FORMATS,
+    SOURCES_BY_NAME,
+    iter_export,
+    iter_gzip
+)
+
+
+class Command(BaseCommand):
+    help = "Stream tables to csv or jsonl files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output_dir',
+            help='Directory to write the files to',
+        )
+        parser.add_argument(
+            '--format', choices=EXPORT_FORMATS, default='csv',
+            dest='export_format',
+        )
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Compress every file on the fly',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Rows fetched from the database cursor at once',
+        )
+        parser.add_argument(
+            '--only', nargs='+', choices=SOURCES_BY_NAME,
+            default=list(SOURCES_BY_NAME),
+            help='Tables to export',
+        )
+
+    def handle(self, *args, **options):
+        output_dir = options['output_dir']
+        if not os.path.isdir(output_dir):
+            raise CommandError(f'{output_dir} is not a directory')
+        extension = options['export_format']
+        if options['gzip']:
+            extension += '.gz'
+        for name in options['only']:
+            chunks = iter_export(
+                SOURCES_BY_NAME[name],
+                options['export_format'],
+                options['chunk_size'],
+            )
+            path = os.path.join(output_dir, f'{name}.{extension}')
+            if options['gzip']:
+                with open(path, 'wb') as file:
+                    file.writelines(iter_gzip(chunks))
+            else:
+                with open(path, 'w', encoding='utf-8', newline='') as file:
+                    file.writelines(chunks)
+            self.stdout.write(f'{path} written')
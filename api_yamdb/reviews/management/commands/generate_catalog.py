@@ -0,0 +1,252 @@
+import random
+import time
+from bisect import bisect
+from itertools import accumulate, islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.cache import invalidate_all
+from reviews.models import (
+    Category,
+    Comments,
+    Genre,
+    GenreTitle,
+    Review,
+    Title
+)
+from users.models import CustomUser
+
+WORDS = (
+    'тень', 'город', 'море', 'ветер', 'звезда', 'дорога', 'огонь', 'сад',
+    'ночь', 'время', 'война', 'мир', 'песня', 'зима', 'река', 'остров',
+    'последний', 'тихий', 'красный', 'старый', 'далёкий', 'большой',
+    'shadow', 'city', 'river', 'night', 'star', 'road', 'fire', 'winter',
+)
+# Оценки смещены к высоким, как на реальных сайтах с отзывами.
+SCORE_WEIGHTS = (1, 1, 2, 3, 5, 8, 12, 16, 14, 10)
+
+
+def zipf_weights(count, skew):
+    '''Накопленные веса: k-й по популярности объект получает 1/k^skew.'''
+    return list(accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic catalog: titles, users, reviews and comments '
+        'with Zipf-skewed popularity, inserted in bulk'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--users', type=int, default=2000,
+            help='Also the most reviews a single title can get',
+        )
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument(
+            '--skew', type=float, default=1.0,
+            help='Zipf exponent of title and review popularity',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument(
+            '--prefix', default='synthetic',
+            help='Prefix of generated names, used by --delete',
+        )
+        parser.add_argument(
+            '--delete', action='store_true',
+            help='Delete a catalog generated with this prefix and exit',
+        )
+
+    def handle(self, *args, **options):
+        self.prefix = options['prefix']
+        self.verbosity = options['verbosity']
+        self.batch_size = options['batch_size']
+        if options['delete']:
+            self.delete()
+            invalidate_all()
+            return
+        if Title.objects.filter(
+            name__startswith=f'{self.prefix} '
+        ).exists():
+            raise CommandError(
+                f'Catalog "{self.prefix}" already exists, '
+                f'run with --delete first'
+            )
+        self.random = random.Random(options['seed'])
+        self.skew = options['skew']
+        started = time.monotonic()
+        user_ids = self.create_users(options['users'])
+        category_ids = self.create_named(
+            Category, 'category', options['categories']
+        )
+        genre_ids = self.create_named(Genre, 'genre', options['genres'])
+        title_ids = self.create_titles(
+            options['titles'], category_ids, genre_ids
+        )
+        reviews = self.create_reviews(
+            options['reviews'], title_ids, user_ids
+        )
+        review_ids = list(Review.objects.filter(
+            title_id__in=title_ids
+        ).values_list('pk', flat=True)) if reviews else []
+        comments = self.create_comments(
+            options['comments'], review_ids, user_ids
+        )
+        self.log('ratings')
+        Title.objects.filter(pk__in=title_ids).rebuild_ratings()
+        invalidate_all()
+        self.stdout.write(
+            f'Created {len(user_ids)} users, {len(title_ids)} titles, '
+            f'{reviews} reviews, {comments} comments '
+            f'in {time.monotonic() - started:.1f}s'
+        )
+
+    def log(self, stage, done=None):
+        if self.verbosity > 1:
+            suffix = '' if done is None else f' {done}'
+            self.stdout.write(f'{stage}{suffix}')
+
+    def bulk_create(self, model, objects):
+        created = 0
+        for batch in batched(objects, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            created += len(batch)
+            self.log(model._meta.db_table, created)
+        return created
+
+    def words(self, low, high):
+        return ' '.join(
+            self.random.choices(WORDS, k=self.random.randint(low, high))
+        )
+
+    def create_users(self, count):
+        self.bulk_create(CustomUser, (
+            CustomUser(
+                username=f'{self.prefix}-user-{idx}',
+                email=f'{self.prefix}-user-{idx}@synthetic.local',
+            )
+            for idx in range(count)
+        ))
+        return list(CustomUser.objects.filter(
+            username__startswith=f'{self.prefix}-user-'
+        ).values_list('pk', flat=True))
+
+    def create_named(self, model, kind, count):
+        self.bulk_create(model, (
+            model(
+                name=f'{self.prefix} {kind} {idx}',
+                slug=f'{self.prefix}-{kind}-{idx}',
+            )
+            for idx in range(count)
+        ))
+        return list(model.objects.filter(
+            slug__startswith=f'{self.prefix}-{kind}-'
+        ).values_list('pk', flat=True))
+
+    def create_titles(self, count, category_ids, genre_ids):
+        category_weights = zipf_weights(len(category_ids), self.skew)
+        self.bulk_create(Title, (
+            Title(
+                name=f'{self.prefix} {self.words(1, 3)} {idx}',
+                year=self.random.randint(1950, 2023),
+                description=self.words(5, 20),
+                category_id=self.random.choices(
+                    category_ids, cum_weights=category_weights
+                )[0] if category_ids else None,
+            )
+            for idx in range(count)
+        ))
+        title_ids = list(Title.objects.filter(
+            name__startswith=f'{self.prefix} '
+        ).values_list('pk', flat=True))
+        if genre_ids:
+            self.bulk_create(GenreTitle, (
+                GenreTitle(title_id=title_id, genre_id=genre_id)
+                for title_id in title_ids
+                for genre_id in self.random.sample(
+                    genre_ids, min(len(genre_ids), self.random.randint(1, 3))
+                )
+            ))
+        return title_ids
+
+    def spread(self, total, count, limit):
+        '''Распределяет total объектов по count позициям по Ципфу.'''
+        weights = zipf_weights(count, self.skew)
+        counts = [0] * count
+        for _ in range(total):
+            counts[bisect(weights, self.random.random() * weights[-1])] += 1
+        return [min(value, limit) for value in counts]
+
+    def create_reviews(self, total, title_ids, user_ids):
+        if not title_ids or not user_ids:
+            return 0
+        title_ids = self.random.sample(title_ids, len(title_ids))
+        counts = self.spread(total, len(title_ids), len(user_ids))
+        # Автор пишет не больше одного отзыва на произведение.
+        return self.bulk_create(Review, (
+            Review(
+                title_id=title_id,
+                author_id=author_id,
+                score=self.random.choices(
+                    range(1, 11), weights=SCORE_WEIGHTS
+                )[0],
+                text=self.words(5, 40),
+            )
+            for title_id, count in zip(title_ids, counts)
+            for author_id in self.random.sample(user_ids, count)
+        ))
+
+    def create_comments(self, total, review_ids, user_ids):
+        if not review_ids or not user_ids:
+            return 0
+        review_ids = self.random.sample(review_ids, len(review_ids))
+        weights = zipf_weights(len(review_ids), self.skew)
+        return self.bulk_create(Comments, (
+            Comments(
+                review_id=review_ids[
+                    bisect(weights, self.random.random() * weights[-1])
+                ],
+                author_id=self.random.choice(user_ids),
+                text=self.words(3, 25),
+            )
+            for _ in range(total)
+        ))
+
+    def delete(self):
+        titles = Title.objects.filter(name__startswith=f'{self.prefix} ')
+        title_ids = list(titles.values_list('pk', flat=True))
+        for batch in batched(title_ids, self.batch_size):
+            # Без загрузки объектов и сигналов: на миллионах комментариев
+            # обычный delete() упирается в память. Кэш сбрасывается
+            # целиком после удаления.
+            with transaction.atomic():
+                for queryset in (
+                    Comments.objects.filter(review__title_id__in=batch),
+                    Review.objects.filter(title_id__in=batch),
+                    GenreTitle.objects.filter(title_id__in=batch),
+                    Title.objects.filter(pk__in=batch),
+                ):
+                    queryset._raw_delete(queryset.db)
+            self.log('deleted titles', len(batch))
+        Category.objects.filter(slug__startswith=f'{self.prefix}-').delete()
+        Genre.objects.filter(slug__startswith=f'{self.prefix}-').delete()
+        CustomUser.objects.filter(
+            username__startswith=f'{self.prefix}-user-'
+        ).delete()
+        self.stdout.write(f'Deleted catalog "{self.prefix}"')
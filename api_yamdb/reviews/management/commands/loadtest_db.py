@@ -0,0 +1,142 @@
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from uuid import uuid4
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, connections
+
+from reviews.models import Review, Title
+from users.models import CustomUser
+
+
+def run_until(deadline, operation):
+    '''Выполняет операцию до дедлайна; возвращает длительности и ошибки.'''
+    timings = []
+    errors = 0
+    try:
+        while time.monotonic() < deadline:
+            begin = time.perf_counter()
+            try:
+                if operation() is False:
+                    break
+            except DatabaseError:
+                errors += 1
+                continue
+            timings.append(time.perf_counter() - begin)
+    finally:
+        connection.close()
+    return timings, errors
+
+
+def write_reviews(user_id, title_ids, deadline):
+    '''Создаёт отзывы так же, как ReviewViewSet.perform_create.'''
+    pending = random.sample(title_ids, len(title_ids))
+
+    def create_review():
+        if not pending:
+            return False
+        title_id = pending.pop()
+        Review.objects.create(
+            author_id=user_id, title_id=title_id,
+            text='Load test', score=random.randint(1, 10),
+        )
+
+    return ('writes', *run_until(deadline, create_review))
+
+
+def read_titles(deadline):
+    '''Читает первую страницу списка произведений.'''
+    def read_page():
+        list(Title.objects.select_related('category').prefetch_related(
+            'genre'
+        ).order_by('-rating', '-id')[:5])
+
+    return ('reads', *run_until(deadline, read_page))
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure concurrent review writes and title list reads '
+        'against the configured database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--writers', type=int, default=8,
+            help='Processes creating reviews like the reviews endpoint',
+        )
+        parser.add_argument(
+            '--readers', type=int, default=4,
+            help='Processes reading the first page of the titles list',
+        )
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Seconds to run',
+        )
+        parser.add_argument(
+            '--titles', type=int, default=2000,
+            help='Titles to create; each writer reviews each title once',
+        )
+
+    def handle(self, *args, **options):
+        prefix = f'loadtest-{uuid4().hex[:8]}'
+        CustomUser.objects.bulk_create(
+            CustomUser(username=f'{prefix}-{idx}',
+                       email=f'{prefix}-{idx}@loadtest.local')
+            for idx in range(options['writers'])
+        )
+        user_ids = list(CustomUser.objects.filter(
+            username__startswith=prefix
+        ).values_list('pk', flat=True))
+        Title.objects.bulk_create(
+            Title(name=f'{prefix} {idx}', year=2000)
+            for idx in range(options['titles'])
+        )
+        title_ids = list(Title.objects.filter(
+            name__startswith=prefix
+        ).values_list('pk', flat=True))
+        results = {'writes': [], 'reads': []}
+        errors = 0
+        workers = options['writers'] + options['readers']
+        connections.close_all()
+        try:
+            with ProcessPoolExecutor(
+                workers, mp_context=get_context('fork')
+            ) as pool:
+                deadline = time.monotonic() + options['duration']
+                started = time.monotonic()
+                futures = [
+                    pool.submit(write_reviews, user_id, title_ids, deadline)
+                    for user_id in user_ids
+                ] + [
+                    pool.submit(read_titles, deadline)
+                    for _ in range(options['readers'])
+                ]
+                for future in futures:
+                    kind, timings, failed = future.result()
+                    results[kind].extend(timings)
+                    errors += failed
+                elapsed = time.monotonic() - started
+        finally:
+            Title.objects.filter(pk__in=title_ids).delete()
+            CustomUser.objects.filter(username__startswith=prefix).delete()
+        self.report(results, errors, elapsed)
+
+    def report(self, results, errors, elapsed):
+        self.stdout.write(
+            f'{connection.settings_dict["ENGINE"]}, {elapsed:.1f}s'
+        )
+        for kind, timings in results.items():
+            timings.sort()
+            if not timings:
+                self.stdout.write(f'{kind.ljust(6)} none')
+                continue
+            p50 = timings[len(timings) // 2]
+            p95 = timings[min(int(len(timings) * 0.95), len(timings) - 1)]
+            self.stdout.write(
+                f'{kind.ljust(6)} {len(timings) / elapsed:8.1f}/s, '
+                f'p50 {p50 * 1000:.2f}ms, p95 {p95 * 1000:.2f}ms'
+            )
+        self.stdout.write(f'errors {errors}')
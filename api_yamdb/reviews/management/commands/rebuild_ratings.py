@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.cache import invalidate
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = "Rebuild denormalized title ratings from reviews"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = Title.objects.rebuild_ratings()
+            invalidate('titles')
+        self.stdout.write(f"Ratings rebuilt for {updated} titles")
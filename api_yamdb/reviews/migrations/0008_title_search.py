@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from reviews import search
+
+
+def install(apps, schema_editor):
+    search.install(schema_editor)
+
+
+def uninstall(apps, schema_editor):
+    search.uninstall(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_rating_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
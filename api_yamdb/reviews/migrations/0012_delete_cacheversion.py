@@ -0,0 +1,16 @@
+# Generated by Django 3.2 on 2026-10-18 05:03
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_titlesearch'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='CacheVersion',
+        ),
+    ]
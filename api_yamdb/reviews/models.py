@@ -2,7 +2,11 @@ from datetime import datetime
 
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import (
+    Avg, Case, Count, F, FloatField, OuterRef, Subquery, Sum, Value, When
+)
+from django.db.models.functions import Cast, Coalesce
 
 from users.models import CustomUser
 from .constants import (
@@ -11,8 +15,10 @@ from .constants import (
     MIN,
     MAX
 )
+from .search import FTS_TABLE, SearchDocumentField
 
 User = CustomUser
+RATING_FIELDS = ('rating_sum', 'rating_count', 'rating')
 
 
 class Category(models.Model):
@@ -50,6 +56,43 @@ def validate_year(value):
         raise ValidationError(f'Год не может превышать {current_year}.')
 
 
+class TitleQuerySet(models.QuerySet):
+
+    def shift_rating(self, score, count):
+        '''Инкрементально обновляет сумму и число оценок одним UPDATE.'''
+        new_count = F('rating_count') + count
+        return self.update(
+            rating_sum=F('rating_sum') + score,
+            rating_count=new_count,
+            rating=Case(
+                When(rating_count=-count, then=Value(None)),
+                default=(Cast(F('rating_sum') + score, FloatField())
+                         / new_count),
+                output_field=FloatField(),
+            ),
+        )
+
+    def rebuild_ratings(self):
+        '''Пересчитывает рейтинг с нуля по таблице отзывов.'''
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return self.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0
+            ),
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk')).values('total')),
+                0
+            ),
+            rating=Subquery(
+                reviews.annotate(avg=Avg('score')).values('avg'),
+                output_field=FloatField()
+            ),
+        )
+
+
 class Title(models.Model):
     name = models.CharField(
         verbose_name='Название',
@@ -78,14 +121,75 @@ class Title(models.Model):
         null=True,
         blank=True
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        default=0,
+        editable=False
+    )
+    rating = models.FloatField(
+        verbose_name='Рейтинг',
+        null=True,
+        editable=False
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(fields=['-rating', '-id'], name='title_rating_idx')
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        '''Рейтинг меняют только shift_rating и rebuild_ratings.
+
+        Значения, прочитанные при загрузке объекта, не записываются
+        обратно и не затирают оценки, поставленные параллельно.
+        '''
+        if update_fields is None and not force_insert and (
+            not self._state.adding
+        ):
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in RATING_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(force_insert, force_update, using, update_fields)
+
+
+class TitleSearch(models.Model):
+    '''Строка таблицы FTS5 для поиска произведений в SQLite.
+
+    Таблицу и триггеры создаёт reviews.search, модель только описывает
+    её для ORM, чтобы поиск был обычным соединением по rowid.
+    '''
+    title = models.OneToOneField(
+        Title,
+        verbose_name='Произведение',
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name='search_entry'
+    )
+    document = SearchDocumentField(db_column=FTS_TABLE)
+
+    class Meta:
+        managed = False
+        db_table = FTS_TABLE
+
 
 class GenreTitle(models.Model):
     title = models.ForeignKey(
@@ -110,6 +214,9 @@ class GenreTitle(models.Model):
                 name='unique_title_genre'
             )
         ]
+        indexes = [
+            models.Index(fields=['genre', 'title'], name='genre_title_idx')
+        ]
 
     def __str__(self):
         return f'{self.title} - {self.genre}'
@@ -144,6 +251,43 @@ class Review(models.Model):
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        '''Сохраняет отзыв и в той же транзакции сдвигает рейтинг.
+
+        Прежние оценка и произведение читаются из базы, а не из объекта:
+        так изменения из админки и импорта учитываются верно. Удаление
+        обрабатывают сигналы в reviews.signals, они срабатывают и при
+        каскадном удалении.
+        '''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not (
+            {'score', 'title', 'title_id'} & set(update_fields)
+        ):
+            return super().save(*args, **kwargs)
+        using = kwargs.get('using') or router.db_for_write(
+            Review, instance=self
+        )
+        titles = Title.objects.using(using)
+        with transaction.atomic(using=using):
+            old = None
+            if not self._state.adding:
+                old = Review.objects.using(using).filter(
+                    pk=self.pk
+                ).select_for_update().values_list('title_id', 'score').first()
+            super().save(*args, **kwargs)
+            if old is None:
+                titles.filter(pk=self.title_id).shift_rating(self.score, 1)
+                return
+            old_title_id, old_score = old
+            if old_title_id == self.title_id:
+                if old_score != self.score:
+                    titles.filter(pk=self.title_id).shift_rating(
+                        self.score - old_score, 0
+                    )
+                return
+            titles.filter(pk=old_title_id).shift_rating(-old_score, -1)
+            titles.filter(pk=self.title_id).shift_rating(self.score, 1)
+
 
 class Comments(models.Model):
     text = models.TextField(verbose_name='Текст')
@@ -0,0 +1,183 @@
+import re
+
+from django.db import connections
+from django.db.models import (
+    BooleanField, F, FloatField, Func, Lookup, Q, TextField
+)
+from django.db.models.expressions import RawSQL
+
+from .constants import SEARCH_CONFIG
+
+FTS_TABLE = 'reviews_title_fts'
+
+SQLITE_INSTALL = (
+    f'''CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description,
+        content='reviews_title', content_rowid='id',
+        tokenize='unicode61', prefix='2 3'
+    )''',
+    f'''CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+    AFTER INSERT ON reviews_title BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+    AFTER DELETE ON reviews_title BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF name, description ON reviews_title BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END''',
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+)
+SQLITE_UNINSTALL = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+)
+SQLITE_TRIGGERS = (f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au')
+
+POSTGRES_DOCUMENT = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', "
+    "coalesce(\"reviews_title\".\"name\", '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', "
+    "coalesce(\"reviews_title\".\"description\", '')), 'B')"
+)
+POSTGRES_NAME = (
+    f"to_tsvector('{SEARCH_CONFIG}', \"reviews_title\".\"name\")"
+)
+POSTGRES_INSTALL = (
+    'CREATE INDEX IF NOT EXISTS reviews_title_search_idx '
+    f'ON reviews_title USING GIN (({POSTGRES_DOCUMENT}))',
+    'CREATE INDEX IF NOT EXISTS reviews_title_name_search_idx '
+    f'ON reviews_title USING GIN (({POSTGRES_NAME}))',
+)
+POSTGRES_UNINSTALL = (
+    'DROP INDEX IF EXISTS reviews_title_search_idx',
+    'DROP INDEX IF EXISTS reviews_title_name_search_idx',
+)
+
+
+class SearchDocumentField(TextField):
+    '''Скрытый столбец FTS5 с именем таблицы: левая часть MATCH и первый
+    аргумент bm25.'''
+
+
+@SearchDocumentField.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+def install(schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {
+        'sqlite': SQLITE_INSTALL, 'postgresql': POSTGRES_INSTALL
+    }.get(vendor, ())
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def uninstall(schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {
+        'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRES_UNINSTALL
+    }.get(vendor, ())
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def ensure_installed(using):
+    '''Восстанавливает триггеры FTS5 после пересоздания таблицы.
+
+    SQLite-миграции, меняющие reviews_title, пересоздают таблицу и теряют
+    её триггеры; обработчик post_migrate возвращает их и переиндексирует.
+    '''
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            'AND tbl_name = %s', ['reviews_title']
+        )
+        triggers = {row[0] for row in cursor.fetchall()}
+    if set(SQLITE_TRIGGERS) <= triggers:
+        return
+    with connection.schema_editor() as schema_editor:
+        install(schema_editor)
+
+
+def get_terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def search_titles(queryset, query, name_only=False):
+    '''Полнотекстовый поиск произведений по словам-префиксам запроса.
+
+    SQLite использует таблицу FTS5, PostgreSQL — GIN-индекс по tsvector,
+    остальные СУБД — поиск подстроки. При ``name_only=False`` ищет по
+    названию и описанию и добавляет аннотацию ``search_rank`` (чем
+    больше, тем релевантнее).
+    '''
+    terms = get_terms(query)
+    if not terms:
+        return queryset.none()
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        return _search_sqlite(queryset, terms, name_only)
+    if vendor == 'postgresql':
+        return _search_postgres(queryset, terms, name_only)
+    lookup = Q()
+    for term in terms:
+        term_lookup = Q(name__icontains=term)
+        if not name_only:
+            term_lookup |= Q(description__icontains=term)
+        lookup &= term_lookup
+    queryset = queryset.filter(lookup)
+    if name_only:
+        return queryset
+    return queryset.annotate(search_rank=RawSQL('0', [], FloatField()))
+
+
+def _search_sqlite(queryset, terms, name_only):
+    # Таблица FTS5 присоединяется через модель TitleSearch, а не
+    # .extra(): в подзапросах (фасеты, pk__in) Django даёт таблицам
+    # псевдонимы, и условия с явным reviews_title.id там ломаются.
+    column = 'name : ' if name_only else ''
+    match = ' '.join(f'{column}"{term}"*' for term in terms)
+    queryset = queryset.filter(search_entry__document__match=match)
+    if name_only:
+        return queryset
+    return queryset.annotate(search_rank=Func(
+        F('search_entry__document'),
+        function='bm25',
+        template='-%(function)s(%(expressions)s, 10.0, 1.0)',
+        output_field=FloatField(),
+    ))
+
+
+def _search_postgres(queryset, terms, name_only):
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    document = POSTGRES_NAME if name_only else POSTGRES_DOCUMENT
+    condition = f"({document}) @@ to_tsquery('{SEARCH_CONFIG}', %s)"
+    queryset = queryset.filter(
+        RawSQL(condition, [tsquery], output_field=BooleanField())
+    )
+    if name_only:
+        return queryset
+    return queryset.annotate(search_rank=RawSQL(
+        f"ts_rank(({document}), to_tsquery('{SEARCH_CONFIG}', %s))",
+        [tsquery],
+        output_field=FloatField(),
+    ))
@@ -0,0 +1,47 @@
+from django.db import connections
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+
+from .models import Review, Title
+
+PENDING_TITLES_ATTR = 'reviews_pending_rating_titles'
+
+
+def get_pending_titles(using):
+    connection = connections[using]
+    pending = getattr(connection, PENDING_TITLES_ATTR, None)
+    if pending is None:
+        pending = set()
+        setattr(connection, PENDING_TITLES_ATTR, pending)
+    return pending
+
+
+@receiver(pre_delete, sender=Review)
+def collect_rated_title(sender, instance, using, **kwargs):
+    '''Запоминает произведение удаляемого отзыва.
+
+    Django шлёт pre_delete всем удаляемым объектам до того, как удалит
+    хотя бы один, поэтому к первому post_delete известны все
+    произведения пачки: удаления по queryset или каскада с автором и
+    произведением.
+    '''
+    get_pending_titles(using).add(instance.title_id)
+
+
+@receiver(post_delete, sender=Review)
+def rebuild_ratings_on_delete(sender, instance, using, **kwargs):
+    '''Пересчитывает рейтинг всех произведений пачки одним UPDATE.
+
+    Пересчёт с нуля идемпотентен: произведения, оставшиеся от удаления,
+    откаченного с ошибкой, просто пересчитываются ещё раз. Строки
+    произведений сначала блокируются, иначе в PostgreSQL подзапросы
+    UPDATE не увидят оценки, поставленные параллельно.
+    '''
+    pending = get_pending_titles(using)
+    if not pending:
+        return
+    titles = Title.objects.using(using).filter(pk__in=list(pending))
+    pending.clear()
+    if connections[using].features.has_select_for_update:
+        list(titles.select_for_update().values_list('pk', flat=True))
+    titles.rebuild_ratings()
@@ -0,0 +1,18 @@
+import pytest
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def clear_api_cache():
+    from api.cache import CACHE_ALIAS, reset_stats
+    caches[CACHE_ALIAS].clear()
+    reset_stats()
+    yield
+    caches[CACHE_ALIAS].clear()
+
+
+@pytest.fixture(autouse=True)
+def eager_suggest_index(settings):
+    '''Индекс подсказок сверяет версию и перестраивается в самом запросе.'''
+    settings.SUGGEST_POLL_INTERVAL = 0
+    settings.SUGGEST_REBUILD_EAGER = True
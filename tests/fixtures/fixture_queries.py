@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def fail_on_repeated_queries(settings):
+    '''Запрос к API с N+1 завершается ошибкой RepeatedQueriesError.'''
+    settings.QUERY_CHECK = 'raise'
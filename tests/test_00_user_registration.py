@@ -1,8 +1,12 @@
+import warnings
 from http import HTTPStatus
 
 import pytest
 from django.core import mail
+from django.core.cache.backends.base import CacheKeyWarning
+from django.db import connection
 from django.db.utils import IntegrityError
+from django.test.utils import CaptureQueriesContext
 
 from tests.utils import (
     invalid_data_for_user_patch_and_creation,
@@ -375,3 +379,98 @@ class Test00UserRegistration:
             'пользователя, созданного администратором,  возвращает ответ '
             'со статусом 200.'
         )
+
+    def test_00_repeated_signup_sends_one_email(self, client):
+        valid_data = {
+            'email': 'resend@yamdb.fake',
+            'username': 'resend_user'
+        }
+        outbox_before_count = len(mail.outbox)
+        for _ in range(3):
+            response = client.post(self.URL_SIGNUP, data=valid_data)
+            assert response.status_code == HTTPStatus.OK
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            f'Проверьте, что повторные POST-запросы к `{self.URL_SIGNUP}` '
+            'в течение `SIGNUP_RESEND_WINDOW` отправляют только одно письмо.'
+        )
+
+    def test_00_signup_duplicate_check_uses_one_query(self, client):
+        client.post(self.URL_SIGNUP, data={
+            'email': 'first@yamdb.fake',
+            'username': 'first_user'
+        })
+        client.post(self.URL_SIGNUP, data={
+            'email': 'second@yamdb.fake',
+            'username': 'second_user'
+        })
+        conflict_data = {
+            'email': 'first@yamdb.fake',
+            'username': 'second_user'
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.URL_SIGNUP, data=conflict_data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert set(response.json()) == {'username', 'email'}, (
+            'Проверьте, что при конфликте по имени и email ответ содержит '
+            'ошибки для обоих полей.'
+        )
+        selects = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+        ]
+        assert len(selects) == 1, (
+            'Проверьте, что при конфликте данных занятые имя и email '
+            'определяются одним запросом к базе.'
+        )
+
+    def test_00_signup_throttled_per_email(self, client, settings):
+        valid_data = {
+            'email': 'throttle@yamdb.fake',
+            'username': 'throttle_user'
+        }
+        rate = settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'][
+            'signup_email'
+        ]
+        limit = int(rate.split('/')[0])
+        for _ in range(limit):
+            response = client.post(self.URL_SIGNUP, data=valid_data)
+            assert response.status_code == HTTPStatus.OK
+        response = client.post(self.URL_SIGNUP, data={
+            'email': valid_data['email'].upper(),
+            'username': valid_data['username']
+        })
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что частые POST-запросы к `{self.URL_SIGNUP}` с '
+            'одним email ограничиваются и возвращают ответ со статусом 429.'
+        )
+        assert 'Retry-After' in response
+
+    def test_00_signup_throttle_keys(self, client, settings):
+        email = ' ' + 'a' * 300 + '@yamdb.fake '
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', CacheKeyWarning)
+            response = client.post(self.URL_SIGNUP, data={
+                'email': email, 'username': 'long_email'
+            })
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что непроверенный email не попадает в ключ кэша '
+            'ограничения частоты как есть.'
+        )
+
+        rate = settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']['signup_ip']
+        limit = int(rate.split('/')[0])
+        statuses = [
+            client.post(
+                self.URL_SIGNUP,
+                data={
+                    'email': f'proxy{idx}@yamdb.fake',
+                    'username': f'proxy_user{idx}'
+                },
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{idx}'
+            ).status_code
+            for idx in range(limit)
+        ]
+        assert HTTPStatus.TOO_MANY_REQUESTS in statuses, (
+            'Проверьте, что ограничение по IP нельзя обойти, меняя '
+            'заголовок `X-Forwarded-For`.'
+        )
@@ -153,3 +153,34 @@ class Test02CategoryAPI:
                           HTTPStatus.FORBIDDEN)
         check_permissions(moderator_client, self.CATEGORY_URL, data,
                           'модератора', categories, HTTPStatus.FORBIDDEN)
+
+    def test_06_category_list_is_cached(self, client, admin_client,
+                                        django_assert_num_queries):
+        create_categories(admin_client)
+        client.get(self.CATEGORY_URL)
+        with django_assert_num_queries(0):
+            response = client.get(self.CATEGORY_URL)
+        assert response.json()['count'] == 2, (
+            f'Проверьте, что повторный GET-запрос к `{self.CATEGORY_URL}` '
+            'отдаётся из кэша без обращения к БД.'
+        )
+
+        admin_client.post(
+            self.CATEGORY_URL, data={'name': 'Музыка', 'slug': 'music'}
+        )
+        response = client.get(self.CATEGORY_URL)
+        assert response.json()['count'] == 3, (
+            'Проверьте, что кэш списка категорий сбрасывается при '
+            'создании категории.'
+        )
+
+        response = admin_client.get('/api/v1/cache/stats/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['categories'] == {
+            'hits': 1, 'misses': 2, 'not_modified': 0, 'hit_ratio': 1 / 3
+        }, (
+            'Проверьте, что `/api/v1/cache/stats/` возвращает счётчики '
+            'попаданий и промахов кэша.'
+        )
+        response = client.get('/api/v1/cache/stats/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
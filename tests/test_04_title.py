@@ -353,3 +353,396 @@ class Test04TitleAPI:
             f'Проверьте, что PUT-запрос к `{self.TITLES_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def test_07_titles_cursor_pagination(self, client):
+        from reviews.models import Title
+        ratings = [None, 7.5, 3.0, None, 7.5, 10.0, 1.0, 3.0, None, 7.5, 5.0]
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {idx}', year=2000, rating=rating)
+            for idx, rating in enumerate(ratings)
+        )
+        expected = list(
+            Title.objects.order_by('-rating', '-id').values_list(
+                'id', flat=True
+            )
+        )
+
+        received = []
+        url = f'{self.TITLES_URL}?cursor='
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что GET-запрос к '
+                f'`{self.TITLES_URL}?cursor=` возвращает ответ со статусом '
+                '200.'
+            )
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в режиме курсорной пагинации ответ не '
+                'содержит ключ `count`.'
+            )
+            received.extend(title['id'] for title in data['results'])
+            url = data['next']
+        assert received == expected, (
+            'Проверьте, что курсорная пагинация по `/api/v1/titles/` '
+            'возвращает все произведения ровно один раз и в том же '
+            'порядке, что и постраничная.'
+        )
+
+        response = client.get(f'{self.TITLES_URL}?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что некорректный курсор возвращает ответ со '
+            'статусом 404.'
+        )
+
+    def test_08_titles_query_count_is_constant(self, client, admin_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        titles, _, _ = create_titles(admin_client)
+
+        def count_queries(url):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            return len(context.captured_queries)
+
+        detail_url = self.TITLES_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        list_queries = count_queries(self.TITLES_URL)
+        detail_queries = count_queries(detail_url)
+        for idx in range(4):
+            admin_client.post(self.TITLES_URL, data={
+                'name': f'Произведение {idx}',
+                'year': 2000,
+                'genre': titles[0]['genre'],
+                'category': titles[0]['category'],
+            })
+        assert count_queries(self.TITLES_URL) == list_queries, (
+            f'Проверьте, что число запросов к БД при GET-запросе к '
+            f'`{self.TITLES_URL}` не растёт вместе с размером страницы.'
+        )
+        assert count_queries(detail_url) == detail_queries
+        assert list_queries <= 4, (
+            f'Проверьте, что для GET-запроса к `{self.TITLES_URL}` категории '
+            'и жанры загружаются через select_related/prefetch_related.'
+        )
+
+    def test_09_titles_full_text_search(self, client, admin_client):
+        from reviews.models import Title
+        Title.objects.bulk_create([
+            Title(name='Морской волк', year=1904,
+                  description='Роман о капитане шхуны'),
+            Title(name='Капитанская дочка', year=1836,
+                  description='Повесть о пугачёвском бунте'),
+            Title(name='Белый клык', year=1906,
+                  description='История волка'),
+        ])
+        title = Title.objects.get(name='Белый клык')
+        title.name = 'Белый Клык'
+        title.save()
+
+        response = client.get(f'{self.TITLES_URL}?search=капитан')
+        assert response.status_code == HTTPStatus.OK
+        names = [title['name'] for title in response.json()['results']]
+        assert names == ['Капитанская дочка', 'Морской волк'], (
+            'Проверьте, что параметр `search` ищет по названию и описанию '
+            'произведения по началу слова, а совпадения в названии '
+            'выдаются первыми.'
+        )
+
+        response = client.get(f'{self.TITLES_URL}?name=волк')
+        names = [title['name'] for title in response.json()['results']]
+        assert names == ['Морской волк'], (
+            'Проверьте, что параметр `name` ищет только по названию.'
+        )
+
+        response = client.get(f'{self.TITLES_URL}?search=клык')
+        names = [title['name'] for title in response.json()['results']]
+        assert names == ['Белый Клык'], (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'произведения.'
+        )
+
+        Title.objects.filter(name='Белый Клык').delete()
+        response = client.get(f'{self.TITLES_URL}?search=волк')
+        assert response.json()['count'] == 1
+
+        response = client.get(f'{self.TITLES_URL}?search=волк&cursor=')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что курсорная пагинация недоступна для выдачи, '
+            'отсортированной по релевантности.'
+        )
+
+    def test_10_suggest(self, client, admin_client):
+        from api.cache import invalidate_all
+        from reviews.models import Genre, Title
+        SUGGEST_URL = '/api/v1/suggest/'
+        Genre.objects.create(name='Фэнтези', slug='fantasy')
+        ring = Title.objects.create(name='Властелин колец', year=1954)
+        title = Title.objects.create(name='Война и мир', year=1869)
+
+        response = client.get(f'{SUGGEST_URL}?q=Вла')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{SUGGEST_URL}` доступен без '
+            'авторизации.'
+        )
+        assert response.json()['results'] == [
+            {'type': 'title', 'id': ring.pk, 'name': 'Властелин колец'}
+        ]
+        response = client.get(f'{SUGGEST_URL}?q=КОЛ')
+        assert [item['name'] for item in response.json()['results']] == [
+            'Властелин колец'
+        ], 'Проверьте, что подсказки ищут по началу любого слова названия.'
+        response = client.get(f'{SUGGEST_URL}?q=фэн')
+        assert response.json()['results'] == [
+            {'type': 'genre', 'slug': 'fantasy', 'name': 'Фэнтези'}
+        ]
+
+        title.name = 'Вокруг света за 80 дней'
+        title.save()
+        Title.objects.filter(name='Властелин колец').delete()
+        response = client.get(f'{SUGGEST_URL}?q=в')
+        assert [item['name'] for item in response.json()['results']] == [
+            'Вокруг света за 80 дней'
+        ], (
+            'Проверьте, что индекс подсказок обновляется при изменении и '
+            'удалении объектов.'
+        )
+
+        Title.objects.bulk_create(
+            Title(name=f'Вечер {idx}', year=2000) for idx in range(30)
+        )
+        invalidate_all()
+        response = client.get(f'{SUGGEST_URL}?q=ве&limit=100')
+        assert len(response.json()['results']) == 20, (
+            'Проверьте, что число подсказок ограничено.'
+        )
+
+    def test_11_titles_facets(self, client, admin_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        titles, _, _ = create_titles(admin_client)
+        response = client.get(f'{self.TITLES_URL}?facets=true')
+        assert response.status_code == HTTPStatus.OK
+        expected = {
+            'genre': {
+                slug: 1 for title in titles for slug in title['genre']
+            },
+            'category': {title['category']: 1 for title in titles},
+            'year': {str(title['year']): 1 for title in titles},
+        }
+        assert response.json()['facets'] == expected, (
+            'Проверьте, что при параметре `facets` ответ содержит число '
+            'произведений по жанрам, категориям и годам.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(
+                f'{self.TITLES_URL}?facets=true&page=1'
+            )
+        assert response.json()['facets'] == expected
+        assert not any(
+            'GROUP BY' in query['sql'] for query in context.captured_queries
+        ), (
+            'Проверьте, что счётчики фасетов не пересчитываются для каждой '
+            'страницы выдачи.'
+        )
+
+        response = client.get(
+            f'{self.TITLES_URL}?facets=true&year={titles[0]["year"]}'
+        )
+        assert response.json()['facets']['year'] == {
+            str(titles[0]['year']): 1
+        }, 'Проверьте, что счётчики фасетов учитывают фильтры запроса.'
+
+        admin_client.delete(
+            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[1]['id'])
+        )
+        response = client.get(f'{self.TITLES_URL}?facets=true')
+        assert response.json()['facets']['year'] == {
+            str(titles[0]['year']): 1
+        }, (
+            'Проверьте, что счётчики фасетов сбрасываются при изменении '
+            'произведений.'
+        )
+
+    def test_12_titles_multi_value_and_range_filters(self, client,
+                                                     admin_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from reviews.models import Title
+
+        titles, categories, genres = create_titles(admin_client)
+        Title.objects.filter(pk=titles[0]['id']).update(rating=8.0)
+        both_genres = ','.join(genre['slug'] for genre in genres)
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(
+                f'{self.TITLES_URL}?genre__in={both_genres}'
+            )
+        assert response.status_code == HTTPStatus.OK
+        ids = [title['id'] for title in response.json()['results']]
+        assert sorted(ids) == sorted(title['id'] for title in titles), (
+            'Проверьте, что фильтр `genre__in` возвращает произведения '
+            'любого из жанров без повторов.'
+        )
+        assert not any(
+            'DISTINCT' in query['sql'] for query in context.captured_queries
+        ), 'Проверьте, что фильтр `genre__in` не использует DISTINCT.'
+
+        response = client.get(
+            f'{self.TITLES_URL}?category__in={categories[1]["slug"]},missing'
+        )
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[1]['id']
+        ], 'Проверьте, что фильтр `category__in` принимает список слагов.'
+
+        response = client.get(
+            f'{self.TITLES_URL}?year__gte=1985&year__lte=2000'
+        )
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[1]['id']
+        ], 'Проверьте работу фильтров `year__gte` и `year__lte`.'
+
+        response = client.get(f'{self.TITLES_URL}?rating__gte=7.5')
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[0]['id']
+        ], 'Проверьте работу фильтра `rating__gte`.'
+
+        response = client.get(f'{self.TITLES_URL}?rating_count=5')
+        assert len(response.json()['results']) == len(titles), (
+            'Проверьте, что служебные поля рейтинга `rating_sum` и '
+            '`rating_count` не доступны как фильтры.'
+        )
+
+    def test_13_titles_async_views(self, client, admin_client, admin):
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncRequestFactory
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from api.async_views import as_async_view
+        from api.views import TitleViewSet
+
+        titles, _, genres = create_titles(admin_client)
+        list_view = as_async_view(
+            TitleViewSet.as_view({'get': 'list', 'post': 'create'})
+        )
+        detail_view = as_async_view(
+            TitleViewSet.as_view({'get': 'retrieve'})
+        )
+        factory = AsyncRequestFactory()
+
+        url = f'{self.TITLES_URL}?genre={genres[0]["slug"]}&facets=true'
+        response = async_to_sync(list_view)(factory.get(url))
+        expected = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.content == expected.content, (
+            'Проверьте, что асинхронный список произведений возвращает то же, '
+            'что и синхронный: с теми же фильтрами и пагинацией.'
+        )
+        assert response['ETag'] == expected['ETag']
+
+        detail_url = self.TITLES_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        response = async_to_sync(detail_view)(
+            factory.get(detail_url), pk=str(titles[0]['id'])
+        )
+        assert response.content == client.get(detail_url).content
+
+        data = {'name': 'Новое', 'year': 2000, 'genre': [genres[0]['slug']],
+                'category': titles[0]['category']}
+        response = async_to_sync(list_view)(factory.post(
+            self.TITLES_URL, data=data, content_type='application/json'
+        ))
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что асинхронные маршруты проверяют права так же, как '
+            'синхронные.'
+        )
+        response = async_to_sync(list_view)(factory.post(
+            self.TITLES_URL, data=data, content_type='application/json',
+            authorization=f'Bearer {AccessToken.for_user(admin)}'
+        ))
+        assert response.status_code == HTTPStatus.CREATED
+
+    def test_14_suggest_index_of_other_process(self, client):
+        from api.suggest import SuggestIndex
+        from reviews.models import Title
+        # Индекс другого процесса: изменения моделей в этом процессе к
+        # нему не применяются, он узнаёт о них только по версии в кэше.
+        other = SuggestIndex()
+        assert other.lookup('мас', 10) == []
+        title = Title.objects.create(name='Мастер и Маргарита', year=1967)
+        assert other.lookup('мас', 10) == [
+            {'type': 'title', 'id': title.pk, 'name': 'Мастер и Маргарита'}
+        ], (
+            'Проверьте, что индекс подсказок в других процессах '
+            'перестраивается после изменения названий.'
+        )
+
+    def test_15_titles_search_with_facets(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        name = titles[0]['name'].split()[0]
+        for params in (f'search={name}', f'name={name}'):
+            response = client.get(f'{self.TITLES_URL}?{params}&facets')
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что фасеты считаются и для выдачи, '
+                'отфильтрованной полнотекстовым поиском.'
+            )
+            data = response.json()
+            assert data['count'] == 1
+            assert data['facets']['year'] == {str(titles[0]['year']): 1}
+            assert data['facets']['genre'] == {
+                slug: 1 for slug in titles[0]['genre']
+            }
+
+    def test_16_suggest_index_refresh(self, client, settings, monkeypatch,
+                                      django_assert_num_queries):
+        from api import suggest
+        from reviews.models import Title
+        other = suggest.SuggestIndex()
+        assert other.lookup('мас', 10) == []
+        settings.SUGGEST_REBUILD_EAGER = False
+        settings.SUGGEST_POLL_INTERVAL = 60
+        title = Title.objects.create(name='Мастер и Маргарита', year=1967)
+        other.lookup('мас', 10)
+        assert other.thread is None, (
+            'Проверьте, что индекс подсказок сверяет версию не чаще раза в '
+            '`SUGGEST_POLL_INTERVAL` секунд.'
+        )
+        settings.SUGGEST_POLL_INTERVAL = 0
+        with django_assert_num_queries(0):
+            other.lookup('мас', 10)
+        assert other.thread is not None, (
+            'Проверьте, что устаревший индекс подсказок перестраивается в '
+            'фоновом потоке, а не в запросе.'
+        )
+        other.thread.join()
+        assert other.lookup('мас', 10) == [
+            {'type': 'title', 'id': title.pk, 'name': 'Мастер и Маргарита'}
+        ]
+
+        settings.SUGGEST_REBUILD_EAGER = True
+        suggest.index.lookup('мас', 10)
+        bump_versions = suggest.bump_versions
+
+        def bump_after_other_process(groups):
+            # Другой процесс меняет название и версию между чтением версии
+            # и её сменой в этом процессе.
+            Title.objects.filter(pk=title.pk).update(name='Война и мир')
+            bump_versions(groups)
+            return bump_versions(groups)
+
+        monkeypatch.setattr(suggest, 'bump_versions', bump_after_other_process)
+        Title.objects.create(name='Воскресение', year=1899)
+        monkeypatch.setattr(suggest, 'bump_versions', bump_versions)
+        response = client.get('/api/v1/suggest/?q=во')
+        assert sorted(
+            item['name'] for item in response.json()['results']
+        ) == ['Война и мир', 'Воскресение'], (
+            'Проверьте, что индекс подсказок не принимает версию, которую '
+            'между чтением и сменой изменил другой процесс.'
+        )
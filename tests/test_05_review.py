@@ -413,3 +413,215 @@ class Test05ReviewAPI:
             f'Проверьте, что PUT-запрос к `{self.REVIEW_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def test_07_title_rating_is_maintained(self, admin_client, admin,
+                                           user_client, user,
+                                           moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_url = self.TITLE_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        review_url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[1]['id']
+        )
+
+        user_client.patch(review_url, data={'score': 8})
+        assert admin_client.get(title_url).json().get('rating') == 6, (
+            'Проверьте, что после изменения оценки в отзыве рейтинг '
+            'произведения пересчитывается.'
+        )
+
+        user_client.delete(review_url)
+        assert admin_client.get(title_url).json().get('rating') == 5, (
+            'Проверьте, что после удаления отзыва рейтинг произведения '
+            'пересчитывается.'
+        )
+
+        from django.core.management import call_command
+        from reviews.models import Review, Title
+        Review.objects.filter(title_id=titles[0]['id']).delete()
+        call_command('rebuild_ratings')
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating, title.rating_count, title.rating_sum) == (
+            None, 0, 0
+        ), (
+            'Проверьте, что команда `rebuild_ratings` пересчитывает рейтинг '
+            'произведений по таблице отзывов.'
+        )
+
+    def test_08_reviews_list_query_count(self, client, admin_client, admin,
+                                         user_client, user, moderator_client,
+                                         moderator,
+                                         django_assert_num_queries):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, titles = create_reviews(admin_client, author_map)
+
+        with django_assert_num_queries(2):
+            response = client.get(
+                self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+            )
+        assert response.json()['count'] == len(author_map), (
+            'Проверьте, что GET-запрос к '
+            f'`{self.REVIEWS_URL_TEMPLATE}` выполняет не более двух '
+            'запросов к БД и возвращает корректное значение `count`.'
+        )
+
+        with django_assert_num_queries(1):
+            response = client.get(
+                self.REVIEWS_URL_TEMPLATE.format(title_id='999')
+            )
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что GET-запрос к '
+            f'`{self.REVIEWS_URL_TEMPLATE}` для несуществующего произведения '
+            'возвращает ответ со статусом 404.'
+        )
+
+    def test_09_reviews_conditional_get(self, client, admin_client, admin,
+                                        user_client, user, moderator_client,
+                                        django_assert_num_queries):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+
+        response = client.get(url)
+        etag = response.get('ETag')
+        assert etag, (
+            f'Проверьте, что ответ на GET-запрос к `{self.REVIEWS_URL_TEMPLATE}`'
+            ' содержит заголовок `ETag`.'
+        )
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что GET-запрос с актуальным `If-None-Match` к '
+            f'`{self.REVIEWS_URL_TEMPLATE}` возвращает ответ со статусом 304 '
+            'без обращения к БД.'
+        )
+
+        user_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[1]['id']
+            ),
+            data={'text': 'Изменённый отзыв'}
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после изменения отзыва `ETag` ответа '
+            f'`{self.REVIEWS_URL_TEMPLATE}` меняется.'
+        )
+        assert response.get('ETag') != etag
+
+        create_single_review(moderator_client, titles[1]['id'], 'Норм', 6)
+        response = client.get(url, HTTP_IF_NONE_MATCH=response.get('ETag'))
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что отзыв к другому произведению не меняет `ETag` '
+            f'ответа `{self.REVIEWS_URL_TEMPLATE}`.'
+        )
+
+        response = client.get(url, HTTP_IF_NONE_MATCH='*')
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        response = client.get(
+            self.REVIEWS_URL_TEMPLATE.format(title_id='999'),
+            HTTP_IF_NONE_MATCH='*'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что GET-запрос с `If-None-Match: *` к отзывам '
+            'несуществующего произведения возвращает ответ со статусом 404.'
+        )
+
+    def test_10_rating_follows_writes_outside_api(self, admin_client, admin,
+                                                  user_client, user,
+                                                  moderator_client,
+                                                  moderator):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from reviews.models import Review, Title
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        stale_title = Title.objects.get(pk=title_id)
+
+        review = Review.objects.get(title_id=title_id, author=user)
+        review.score = 2
+        review.save()
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.rating_count) == (12, 3), (
+            'Проверьте, что рейтинг пересчитывается при сохранении отзыва '
+            'не через API, например из админки.'
+        )
+
+        Review.objects.create(
+            title_id=titles[1]['id'], author=moderator, text='Ещё', score=9
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.delete(
+                f'/api/v1/users/{moderator.username}/'
+            )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating, title.rating_count) == (3.5, 2), (
+            'Проверьте, что рейтинг пересчитывается при каскадном удалении '
+            'отзывов вместе с автором.'
+        )
+        assert Title.objects.get(pk=titles[1]['id']).rating is None
+        title_updates = [
+            query for query in context.captured_queries
+            if query['sql'].startswith(f'UPDATE "{Title._meta.db_table}"')
+        ]
+        assert len(title_updates) == 1, (
+            'Проверьте, что при каскадном удалении отзывов рейтинг всех '
+            'затронутых произведений пересчитывается одним запросом.'
+        )
+
+        stale_title.description = 'Новое описание'
+        stale_title.save()
+        title = Title.objects.get(pk=title_id)
+        assert title.description == 'Новое описание'
+        assert (title.rating, title.rating_count) == (3.5, 2), (
+            'Проверьте, что сохранение произведения не перезаписывает '
+            'рейтинг значениями, прочитанными при загрузке.'
+        )
+
+    def test_11_etag_after_cache_eviction(self, client, admin_client,
+                                          admin, user_client, user,
+                                          moderator):
+        from django.core.cache import caches
+
+        from api.cache import CACHE_ALIAS
+        from reviews.models import Review
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        cache = caches[CACHE_ALIAS]
+        cache.clear()
+        etag = client.get(url).get('ETag')
+
+        # Кэш перезапущен: счётчики версий вытеснены вместе с ответами.
+        cache.clear()
+        Review.objects.create(
+            title_id=titles[0]['id'], author=moderator, text='Ещё', score=7
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что версии, вытесненные из кэша, начинаются заново '
+            'со значений, которых ещё не было, и старый `ETag` не '
+            'совпадает с новым.'
+        )
+        assert response.json()['count'] == len(reviews) + 1
+        assert response.get('ETag') != etag
@@ -366,3 +366,34 @@ class Test06CommentAPI:
             f'Проверьте, что PUT-запрос к `{self.COMMENT_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def test_08_comments_list_query_count(self, client, admin_client, admin,
+                                          user_client, user, moderator_client,
+                                          moderator,
+                                          django_assert_num_queries):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id']
+        )
+
+        with django_assert_num_queries(2):
+            response = client.get(url)
+        assert response.json()['count'] == len(comments), (
+            f'Проверьте, что GET-запрос к `{self.COMMENTS_URL_TEMPLATE}` '
+            'выполняет не более двух запросов к БД и возвращает корректное '
+            'значение `count`.'
+        )
+
+        with django_assert_num_queries(1):
+            response = client.get(self.COMMENTS_URL_TEMPLATE.format(
+                title_id=titles[1]['id'], review_id=reviews[0]['id']
+            ))
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            f'Проверьте, что GET-запрос к `{self.COMMENTS_URL_TEMPLATE}` для '
+            'отзыва к другому произведению возвращает ответ со статусом 404.'
+        )
@@ -0,0 +1,190 @@
+import pytest
+from django.core.management import call_command
+from django.db import connections
+
+
+@pytest.fixture
+def file_database(tmp_path):
+    '''Основная база в файле: процессы пула не видят базу в памяти.'''
+    memory_database = connections['default']
+    database = type(memory_database)(
+        {**memory_database.settings_dict,
+         'NAME': str(tmp_path / 'db.sqlite3')},
+        'default'
+    )
+    connections['default'] = database
+    call_command('migrate', verbosity=0)
+    yield database
+    database.close()
+    connections['default'] = memory_database
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08ImportCommand:
+
+    def test_01_import_is_idempotent(self):
+        from reviews.models import Comments, GenreTitle, Review, Title
+
+        call_command('closepoll', batch_size=10)
+        counts = (
+            Title.objects.count(),
+            Review.objects.count(),
+            Comments.objects.count(),
+            GenreTitle.objects.count(),
+        )
+        assert all(counts), (
+            'Проверьте, что команда `closepoll` загружает данные из '
+            '`static/data/`.'
+        )
+        assert not Title.objects.filter(
+            reviews__isnull=False, rating__isnull=True
+        ).exists(), (
+            'Проверьте, что после загрузки `closepoll` пересчитывает рейтинг '
+            'произведений.'
+        )
+
+        call_command('closepoll', conflicts='upsert')
+        call_command('closepoll')
+        assert counts == (
+            Title.objects.count(),
+            Review.objects.count(),
+            Comments.objects.count(),
+            GenreTitle.objects.count(),
+        ), (
+            'Проверьте, что повторная загрузка `closepoll` не создаёт '
+            'дубликатов.'
+        )
+
+    def test_02_dependency_levels(self):
+        from reviews.dataset import SOURCES
+        from reviews.management.commands._private import dependency_levels
+
+        levels = [
+            {source.filename for source in level}
+            for level in dependency_levels(SOURCES)
+        ]
+        assert levels == [
+            {'category.csv', 'genre.csv', 'users.csv'},
+            {'titles.csv'},
+            {'review.csv', 'genre_title.csv'},
+            {'comments.csv'},
+        ], (
+            'Проверьте, что файлы загружаются уровнями по зависимостям '
+            'внешних ключей.'
+        )
+
+    def test_03_import_resumes_and_reports_rejects(self, tmp_path):
+        import csv
+        import shutil
+
+        from django.conf import settings
+        from reviews.management.commands._private import Checkpoints
+        from reviews.models import Review
+
+        data_dir = tmp_path / 'data'
+        shutil.copytree(settings.BASE_DIR / 'static/data', data_dir)
+        with open(data_dir / 'review.csv', 'a', encoding='utf-8') as file:
+            file.write(
+                '\n900,999,"Нет произведения",100,5,2020-01-01T00:00:00Z\n'
+                '901,1,"Плохая оценка",100,abc,2020-01-01T00:00:00Z\n'
+            )
+        checkpoint = tmp_path / 'checkpoint.json'
+        rejects = tmp_path / 'rejects.csv'
+        Checkpoints(str(checkpoint)).set(str(data_dir / 'review.csv'), 60)
+
+        call_command(
+            'closepoll', data_dir=str(data_dir), checkpoint=str(checkpoint),
+            rejects=str(rejects), batch_size=5
+        )
+        assert Review.objects.count() == 72 - 60, (
+            'Проверьте, что `closepoll` продолжает загрузку файла с '
+            'сохранённой контрольной точки.'
+        )
+        assert not checkpoint.exists(), (
+            'Проверьте, что после успешной загрузки контрольная точка '
+            'удаляется.'
+        )
+        with open(rejects, encoding='utf-8') as file:
+            rejected = {
+                row['data']: row['reason'] for row in csv.DictReader(file)
+                if row['file'] == 'review.csv'
+            }
+        assert len(rejected) == 2 and all(rejected.values()), (
+            'Проверьте, что некорректные записи не прерывают загрузку и '
+            'сохраняются в файл отказов вместе с причиной.'
+        )
+
+    def count_rows(self):
+        from reviews.dataset import SOURCES
+        return {
+            source.filename: source.model.objects.count()
+            for source in SOURCES
+        }
+
+    def test_04_parallel_import(self, file_database):
+        from django.conf import settings
+        from reviews.dataset import SOURCES
+        from reviews.management.commands._private import (
+            Importer,
+            RejectLog,
+            read_rows
+        )
+
+        data_dir = settings.BASE_DIR / 'static/data'
+        importer = Importer(
+            str(data_dir), batch_size=7, rejects=RejectLog(None)
+        )
+        importer.load_parallel(SOURCES, workers=3, chunk_size=20)
+        expected = {
+            source.filename: sum(
+                1 for _ in read_rows(str(data_dir / source.filename))
+            )
+            for source in SOURCES
+        }
+        assert self.count_rows() == expected, (
+            'Проверьте, что параллельная загрузка частями загружает все '
+            'записи каждого файла.'
+        )
+        assert importer.rejects.count == 0
+        file_database.check_constraints()
+
+    def test_05_parallel_import_reports_failed_chunk(self, file_database,
+                                                     monkeypatch, tmp_path):
+        from django.conf import settings
+        from django.core.management.base import CommandError
+        from reviews.dataset import SOURCES
+        from reviews.management.commands import _private
+
+        save_batch = _private.save_batch
+
+        def failing_save_batch(source, records, conflicts):
+            if source.filename == 'review.csv' and records[0][0] == 21:
+                raise RuntimeError('connection lost')
+            return save_batch(source, records, conflicts)
+
+        data_dir = str(settings.BASE_DIR / 'static/data')
+        checkpoint = str(tmp_path / 'checkpoint.json')
+        # Процессы пула создаются fork и наследуют подмену.
+        monkeypatch.setattr(_private, 'save_batch', failing_save_batch)
+        with pytest.raises(CommandError, match=r'review\.csv: rows 21-40'):
+            _private.Importer(
+                data_dir, checkpoints=_private.Checkpoints(checkpoint)
+            ).load_parallel(SOURCES, workers=2, chunk_size=20)
+        monkeypatch.setattr(_private, 'save_batch', save_batch)
+        loaded = self.count_rows()
+
+        _private.Importer(
+            data_dir, checkpoints=_private.Checkpoints(checkpoint)
+        ).load_parallel(SOURCES, workers=2, chunk_size=20)
+        counts = self.count_rows()
+        assert counts['review.csv'] > loaded['review.csv'], (
+            'Проверьте, что после ошибки в части файла параллельная загрузка '
+            'продолжается с контрольной точки.'
+        )
+        assert counts == {
+            source.filename: sum(1 for _ in _private.read_rows(
+                f'{data_dir}/{source.filename}'
+            ))
+            for source in SOURCES
+        }
+        file_database.check_constraints()
@@ -0,0 +1,123 @@
+import csv
+import gzip
+import io
+import json
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09Export:
+
+    EXPORT_URL_TEMPLATE = '/api/v1/export/{filename}'
+
+    def test_01_export_endpoint(self, client, admin_client, admin,
+                                user_client, user):
+        reviews, _ = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+
+        response = user_client.get(
+            self.EXPORT_URL_TEMPLATE.format(filename='review.csv')
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что выгрузка данных доступна только администратору.'
+        )
+
+        response = admin_client.get(
+            self.EXPORT_URL_TEMPLATE.format(filename='review.csv')
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдаётся потоковым ответом.'
+        )
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        assert [row['text'] for row in rows] == [
+            review['text'] for review in reviews
+        ], (
+            'Проверьте, что выгрузка `review.csv` содержит все отзывы в '
+            'формате `static/data/review.csv`.'
+        )
+
+        response = admin_client.get(
+            self.EXPORT_URL_TEMPLATE.format(filename='users.jsonl.gz')
+        )
+        lines = gzip.decompress(
+            b''.join(response.streaming_content)
+        ).decode().splitlines()
+        assert {json.loads(line)['username'] for line in lines} == {
+            admin.username, user.username
+        }, (
+            'Проверьте, что выгрузка поддерживает формат jsonl и сжатие gzip.'
+        )
+
+        response = admin_client.get(
+            self.EXPORT_URL_TEMPLATE.format(filename='review.xml')
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_02_export_command_round_trip(self, tmp_path):
+        from reviews.models import Review, Title
+
+        call_command('closepoll')
+        call_command('export_data', str(tmp_path))
+        Title.objects.all().delete()
+        call_command('closepoll', data_dir=str(tmp_path))
+        assert Review.objects.count() == 72, (
+            'Проверьте, что выгрузка `export_data` загружается обратно '
+            'командой `closepoll`.'
+        )
+
+    def test_03_export_under_asgi(self, admin_client, admin, user_client,
+                                  user):
+        reviews, _ = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        path = self.EXPORT_URL_TEMPLATE.format(filename='review.csv')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'authorization',
+                 f'Bearer {AccessToken.for_user(admin)}'.encode()),
+            ],
+            'client': ('127.0.0.1', 50000),
+            'server': ('testserver', 80),
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        async_to_sync(ASGIHandler())(scope, receive, send)
+        assert messages[0]['status'] == HTTPStatus.OK
+        content = b''.join(
+            message.get('body', b'') for message in messages[1:]
+        ).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        assert [row['text'] for row in rows] == [
+            review['text'] for review in reviews
+        ], (
+            'Проверьте, что под ASGI выгрузка отдаётся целиком: Django 3.2 '
+            'перебирает потоковый ответ в событийном цикле, где ORM '
+            'недоступен.'
+        )
@@ -0,0 +1,95 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_titles
+
+
+@pytest.fixture
+def replica(settings):
+    connections.databases['replica'] = {
+        **connections['default'].settings_dict,
+        'TEST': {'MIRROR': 'default'},
+    }
+    settings.DATABASE_REPLICAS = ['replica']
+    yield connections['replica']
+    connections['replica'].close()
+    del connections['replica']
+    del connections.databases['replica']
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10Replicas:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def count_queries(self, client, url, method='get', data=None):
+        with CaptureQueriesContext(connections['default']) as primary:
+            with CaptureQueriesContext(connections['replica']) as replica:
+                response = getattr(client, method)(url, data=data)
+        assert response.status_code < HTTPStatus.BAD_REQUEST
+        return len(primary.captured_queries), len(replica.captured_queries)
+
+    def test_01_reads_go_to_replica(self, client, admin_client, replica,
+                                    settings):
+        titles, _, _ = create_titles(admin_client)
+        settings.REPLICA_LAG_SECONDS = 0
+        primary, from_replica = self.count_queries(client, self.TITLES_URL)
+        assert primary == 0 and from_replica > 0, (
+            'Проверьте, что GET-запросы к `/api/v1/titles/` читают из '
+            'реплики.'
+        )
+        primary, from_replica = self.count_queries(
+            client,
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        )
+        assert primary == 0 and from_replica > 0
+
+    def test_02_writer_reads_own_writes(self, client, user_client,
+                                        admin_client, replica, settings):
+        titles, _, _ = create_titles(admin_client)
+        settings.REPLICA_LAG_SECONDS = 60
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        primary, from_replica = self.count_queries(
+            user_client, url, 'post', {'text': 'Отзыв', 'score': 5}
+        )
+        assert from_replica == 0, (
+            'Проверьте, что запросы на запись идут в основную базу.'
+        )
+
+        primary, from_replica = self.count_queries(user_client, url)
+        assert primary > 0 and from_replica == 0, (
+            'Проверьте, что после записи пользователь читает из основной '
+            'базы и видит свои изменения.'
+        )
+        primary, from_replica = self.count_queries(client, url)
+        assert from_replica == 0, (
+            'Проверьте, что ответ, который попадёт в кэш сразу после '
+            'изменения данных, строится по основной базе.'
+        )
+
+    def test_03_replicas_need_shared_cache(self, settings, tmp_path):
+        from django.test.utils import override_settings
+
+        from api.cache import CACHE_ALIAS
+        from api.checks import check_replica_cache
+
+        settings.DATABASE_REPLICAS = ['replica']
+        assert [warning.id for warning in check_replica_cache(None)] == [
+            'api.W001'
+        ], (
+            'Проверьте, что с репликами и кэшем, своим у каждого процесса, '
+            '`manage.py check` предупреждает: метка чтения из основной '
+            'базы после записи не видна другим воркерам.'
+        )
+        shared_cache = {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }
+        with override_settings(
+            CACHES={**settings.CACHES, CACHE_ALIAS: shared_cache}
+        ):
+            assert check_replica_cache(None) == []
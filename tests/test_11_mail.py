@@ -0,0 +1,156 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+
+
+class SlowBackend(EmailBackend):
+    '''Почтовый сервер, который отвечает с задержкой и считает соединения.'''
+    opened = 0
+
+    def open(self):
+        if not getattr(self, 'is_open', False):
+            type(self).opened += 1
+            self.is_open = True
+        return True
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, messages):
+        time.sleep(0.05)
+        return super().send_messages(messages)
+
+
+class FlakyBackend(EmailBackend):
+    '''Почтовый сервер, который отклоняет первые две попытки.'''
+    failures = 0
+
+    def send_messages(self, messages):
+        if type(self).failures < 2:
+            type(self).failures += 1
+            raise ConnectionError('Сервер недоступен')
+        return super().send_messages(messages)
+
+
+@pytest.fixture
+def mail_queue(settings):
+    from api.mail import mail_queue
+    settings.EMAIL_QUEUE_EAGER = False
+    settings.EMAIL_QUEUE_RETRY_DELAY = 0.01
+    settings.EMAIL_QUEUE_IDLE_TIMEOUT = 0.2
+    yield mail_queue
+    assert mail_queue.flush(timeout=5)
+    # Соединение закрывается после простоя, следующий тест откроет своё.
+    time.sleep(0.3)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11MailQueue:
+
+    SIGNUP_URL = '/api/v1/auth/signup/'
+
+    def test_01_signup_does_not_wait_for_mail_server(self, client, settings,
+                                                     mail_queue):
+        settings.EMAIL_BACKEND = 'tests.test_11_mail.SlowBackend'
+        SlowBackend.opened = 0
+        outbox_before = len(mail.outbox)
+        started = time.monotonic()
+        for idx in range(5):
+            response = client.post(self.SIGNUP_URL, data={
+                'username': f'user{idx}', 'email': f'user{idx}@yamdb.fake'
+            })
+            assert response.status_code == HTTPStatus.OK
+        assert time.monotonic() - started < 0.25, (
+            'Проверьте, что регистрация не ждёт отправки письма.'
+        )
+        assert mail_queue.flush(timeout=5)
+        assert len(mail.outbox) == outbox_before + 5
+        assert SlowBackend.opened == 1, (
+            'Проверьте, что письма отправляются через одно соединение.'
+        )
+
+    def test_02_failed_mail_is_retried(self, settings, mail_queue):
+        from api.mail import queue_mail
+        settings.EMAIL_BACKEND = 'tests.test_11_mail.FlakyBackend'
+        FlakyBackend.failures = 0
+        outbox_before = len(mail.outbox)
+        queue_mail('Тема', 'Текст', 'from@yamdb.fake', ['to@yamdb.fake'])
+        assert mail_queue.flush(timeout=5)
+        assert FlakyBackend.failures == 2
+        assert len(mail.outbox) == outbox_before + 1, (
+            'Проверьте, что неотправленное письмо отправляется повторно.'
+        )
+
+    def test_03_worker_survives_errors(self, settings, monkeypatch,
+                                       mail_queue):
+        import api.mail
+        from api.mail import queue_mail
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.locmem.EmailBackend'
+        )
+        get_connection = api.mail.get_connection
+        calls = []
+
+        def broken_connection(*args, **kwargs):
+            calls.append(1)
+            if len(calls) < 2:
+                raise ConnectionError('Нет настроек почты')
+            return get_connection(*args, **kwargs)
+
+        monkeypatch.setattr(api.mail, 'get_connection', broken_connection)
+        outbox_before = len(mail.outbox)
+        queue_mail('Тема', 'Текст', 'from@yamdb.fake', ['to@yamdb.fake'])
+        assert mail_queue.flush(timeout=5)
+        assert len(mail.outbox) == outbox_before + 1, (
+            'Проверьте, что письмо повторяется, если не удалось открыть '
+            'соединение.'
+        )
+
+        def broken_batch(connection, batch):
+            monkeypatch.undo()
+            raise RuntimeError('Сбой очереди')
+
+        monkeypatch.setattr(mail_queue, 'send_batch', broken_batch)
+        queue_mail('Тема', 'Текст', 'from@yamdb.fake', ['to@yamdb.fake'])
+        assert mail_queue.flush(timeout=5), (
+            'Проверьте, что письма упавшей пачки не блокируют flush.'
+        )
+        assert mail_queue.thread.is_alive(), (
+            'Проверьте, что ошибка не останавливает поток очереди.'
+        )
+        queue_mail('Тема', 'Текст', 'from@yamdb.fake', ['to@yamdb.fake'])
+        assert mail_queue.flush(timeout=5)
+        assert len(mail.outbox) == outbox_before + 2
+
+    @pytest.mark.filterwarnings(
+        'ignore::pytest.PytestUnhandledThreadExceptionWarning'
+    )
+    def test_04_restart_keeps_pending_mail(self, settings, monkeypatch,
+                                           mail_queue):
+        from api.mail import queue_mail
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.locmem.EmailBackend'
+        )
+        outbox_before = len(mail.outbox)
+        queue_mail('Тема', 'Текст', 'from@yamdb.fake', ['to@yamdb.fake'])
+        assert mail_queue.flush(timeout=5)
+
+        def stop(connection):
+            raise SystemExit
+
+        # Следующий проход цикла завершит поток.
+        monkeypatch.setattr(mail_queue, 'next_batch', stop)
+        queue_mail('Тема', 'Текст', 'from@yamdb.fake', ['to@yamdb.fake'])
+        mail_queue.thread.join(timeout=5)
+        assert not mail_queue.thread.is_alive()
+        monkeypatch.undo()
+        pending = mail_queue.queue
+        queue_mail('Тема', 'Текст', 'from@yamdb.fake', ['to@yamdb.fake'])
+        assert mail_queue.queue is pending, (
+            'Проверьте, что перезапуск потока сохраняет очередь писем.'
+        )
+        assert mail_queue.flush(timeout=5)
+        assert len(mail.outbox) == outbox_before + 3
@@ -0,0 +1,137 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tests.utils import (
+    create_single_comment,
+    create_single_review,
+    create_titles
+)
+
+
+def user_queries(context):
+    return [
+        query for query in context.captured_queries
+        if 'users_customuser' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12Authentication:
+    URL_TOKEN = '/api/v1/auth/token/'
+    URL_ME = '/api/v1/users/me/'
+    URL_USERS = '/api/v1/users/'
+
+    def get_client(self, client, user):
+        response = client.post(self.URL_TOKEN, data={
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        })
+        assert response.status_code == HTTPStatus.OK
+        token = response.json()['token']
+        api_client = APIClient()
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return api_client, AccessToken(token)
+
+    def test_01_token_carries_role_claims(self, client, moderator):
+        _, token = self.get_client(client, moderator)
+        assert token['role'] == moderator.role, (
+            f'Проверьте, что токен из `{self.URL_TOKEN}` содержит роль '
+            'пользователя.'
+        )
+        assert token['username'] == moderator.username
+        assert token['is_staff'] is False
+        assert token['is_superuser'] is False
+
+    def test_02_writes_do_not_load_user_row(self, client, user,
+                                            admin_client, settings):
+        titles, _, _ = create_titles(admin_client)
+        user_client, _ = self.get_client(client, user)
+        settings.JWT_REVOCATION_CHECK = False
+        with CaptureQueriesContext(connection) as context:
+            review = create_single_review(
+                user_client, titles[0]['id'], 'Отзыв', 5
+            ).json()
+        assert not user_queries(context), (
+            'Проверьте, что при отключённой проверке отзыва токена запрос '
+            'на запись не читает пользователя из базы.'
+        )
+        assert review['author'] == user.username
+
+        settings.JWT_REVOCATION_CHECK = True
+        create_single_comment(
+            user_client, titles[0]['id'], review['id'], 'Комментарий'
+        )
+        with CaptureQueriesContext(connection) as context:
+            create_single_comment(
+                user_client, titles[0]['id'], review['id'], 'Комментарий'
+            )
+        assert not user_queries(context), (
+            'Проверьте, что результат проверки отзыва токена кэшируется.'
+        )
+
+    def test_03_me_returns_full_user(self, client, user):
+        user_client, _ = self.get_client(client, user)
+        response = user_client.get(self.URL_ME)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['email'] == user.email
+        assert response.json()['bio'] == user.bio
+
+        response = user_client.patch(self.URL_ME, data={'bio': 'Новое'})
+        assert response.status_code == HTTPStatus.OK
+        user.refresh_from_db()
+        assert user.bio == 'Новое'
+        assert user.email == 'testuser@yamdb.fake'
+
+    def test_04_revoked_user_loses_access(self, client, user,
+                                          django_user_model):
+        user_client, _ = self.get_client(client, user)
+        assert user_client.get(self.URL_USERS).status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+        user.role = django_user_model.ADMIN
+        user.save()
+        assert user_client.get(self.URL_USERS).status_code == HTTPStatus.OK, (
+            'Проверьте, что новая роль пользователя действует сразу, без '
+            'получения нового токена.'
+        )
+
+        user.is_active = False
+        user.save()
+        assert user_client.get(self.URL_ME).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что заблокированный пользователь теряет доступ.'
+
+        user.delete()
+        assert user_client.get(self.URL_ME).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что удалённый пользователь теряет доступ.'
+
+    def test_05_revocation_needs_shared_cache(self, settings, tmp_path):
+        from django.test.utils import override_settings
+
+        from api.cache import CACHE_ALIAS
+        from api.checks import check_revocation_cache
+
+        assert [warning.id for warning in check_revocation_cache(None)] == [
+            'api.W002'
+        ], (
+            'Проверьте, что `manage.py check --deploy` предупреждает: с '
+            'кэшем, своим у каждого процесса, другие воркеры не узнают о '
+            'блокировке пользователя до истечения записи.'
+        )
+        shared_cache = {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }
+        with override_settings(
+            CACHES={**settings.CACHES, CACHE_ALIAS: shared_cache}
+        ):
+            assert check_revocation_cache(None) == []
+        settings.JWT_REVOCATION_CHECK = False
+        assert check_revocation_cache(None) == []
@@ -0,0 +1,112 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import permissions
+from tests.utils import (
+    create_single_comment,
+    create_single_review,
+    create_titles
+)
+
+
+def user_fetches(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "users_customuser"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13Permissions:
+
+    def create_objects(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = create_single_review(user_client, title_id, 'Отзыв', 5)
+        review_url = (
+            f'/api/v1/titles/{title_id}/reviews/{review.json()["id"]}/'
+        )
+        comment = create_single_comment(
+            user_client, title_id, review.json()['id'], 'Комментарий'
+        )
+        comment_url = f'{review_url}comments/{comment.json()["id"]}/'
+        return review_url, comment_url
+
+    def check_no_user_fetches(self, client, method, url, data=None):
+        # Первый запрос кэширует состояние пользователя токена.
+        client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(client, method)(url, data=data)
+        assert response.status_code < HTTPStatus.BAD_REQUEST
+        assert not user_fetches(context), (
+            f'Проверьте, что {method.upper()}-запрос к `{url}` не загружает '
+            'пользователей отдельными запросами при проверке прав.'
+        )
+
+    def test_01_author_edits_without_user_queries(self, admin_client,
+                                                  user_client):
+        review_url, comment_url = self.create_objects(
+            admin_client, user_client
+        )
+        self.check_no_user_fetches(
+            user_client, 'patch', comment_url, {'text': 'Новый'}
+        )
+        self.check_no_user_fetches(
+            user_client, 'patch', review_url, {'text': 'Новый'}
+        )
+        self.check_no_user_fetches(user_client, 'delete', comment_url)
+        self.check_no_user_fetches(user_client, 'delete', review_url)
+
+    def test_02_moderator_edits_without_user_queries(self, admin_client,
+                                                     user_client,
+                                                     moderator_client):
+        review_url, comment_url = self.create_objects(
+            admin_client, user_client
+        )
+        self.check_no_user_fetches(
+            moderator_client, 'patch', comment_url, {'text': 'Новый'}
+        )
+        self.check_no_user_fetches(moderator_client, 'delete', comment_url)
+        self.check_no_user_fetches(moderator_client, 'delete', review_url)
+
+    def test_03_roles_are_resolved_once_per_request(self, admin_client,
+                                                    user_client,
+                                                    moderator_client,
+                                                    monkeypatch):
+        review_url, _ = self.create_objects(admin_client, user_client)
+        created = []
+        roles_class = permissions.Roles
+
+        def counting_roles(user):
+            created.append(user)
+            return roles_class(user)
+
+        monkeypatch.setattr(permissions, 'Roles', counting_roles)
+        response = moderator_client.patch(review_url, data={'text': 'Новый'})
+        assert response.status_code == HTTPStatus.OK
+        assert len(created) == 1, (
+            'Проверьте, что роли пользователя вычисляются один раз за запрос.'
+        )
+
+    def test_04_staff_without_admin_role_is_not_admin(self, client,
+                                                      django_user_model):
+        staff = django_user_model.objects.create_user(
+            username='TestStaff', email='teststaff@yamdb.fake',
+            password='1234567', is_staff=True
+        )
+        staff_client = APIClient()
+        staff_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(staff)}'
+        )
+        response = staff_client.post(
+            '/api/v1/categories/', data={'name': 'Кино', 'slug': 'films'}
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что права администратора определяются ролью '
+            'пользователя одинаково для всех эндпоинтов.'
+        )
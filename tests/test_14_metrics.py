@@ -0,0 +1,92 @@
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+
+from api.metrics import reset_metrics
+from tests.utils import create_titles
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    reset_metrics()
+    yield
+    reset_metrics()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14Metrics:
+    URL_METRICS = '/api/v1/metrics/'
+    TITLES_URL = '/api/v1/titles/'
+
+    def get_route(self, admin_client, route, method='GET'):
+        response = admin_client.get(self.URL_METRICS, {'format': 'json'})
+        assert response.status_code == HTTPStatus.OK
+        for item in response.json():
+            if item['route'] == route and item['method'] == method:
+                return item
+        return None
+
+    def test_01_metrics_per_route(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        created_count = len(titles)
+        client.get(self.TITLES_URL)
+        client.get(f'{self.TITLES_URL}?page=1')
+        titles = self.get_route(admin_client, 'titles-list')
+        assert titles is not None and titles['count'] == 2, (
+            f'Проверьте, что `{self.URL_METRICS}` учитывает запросы по '
+            'имени маршрута.'
+        )
+        assert titles['queries'] > 0
+        assert titles['query_time'] > 0
+        assert titles['serializer_time'] > 0
+        assert titles['duration'] >= titles['query_time']
+        assert list(titles['buckets'].values())[-1] == titles['count']
+
+        created = self.get_route(admin_client, 'titles-list', 'POST')
+        assert created is not None and created['count'] == created_count
+
+    def test_02_prometheus_format(self, client, admin_client):
+        client.get(self.TITLES_URL)
+        response = admin_client.get(self.URL_METRICS)
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        assert (
+            'yamdb_request_duration_seconds_count'
+            '{route="titles-list",method="GET"} 1'
+        ) in text, (
+            f'Проверьте, что `{self.URL_METRICS}` отдаёт метрики в формате '
+            'Prometheus.'
+        )
+        assert 'yamdb_db_queries_total{route="titles-list"' in text
+
+    def test_03_metrics_only_for_admin(self, client, user_client):
+        assert client.get(self.URL_METRICS).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+        assert user_client.get(self.URL_METRICS).status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+
+    def test_04_metrics_under_asgi(self, admin_client):
+        response = async_to_sync(AsyncClient().get)(self.TITLES_URL)
+        assert response.status_code == HTTPStatus.OK
+        titles = self.get_route(admin_client, 'titles-list')
+        assert titles is not None and titles['count'] == 1, (
+            'Проверьте, что метрики собираются и под ASGI.'
+        )
+        assert titles['queries'] > 0
+
+    def test_05_unknown_methods_share_series(self, client, admin_client):
+        client.generic('FOO', self.TITLES_URL)
+        client.generic('BAR', self.TITLES_URL)
+        response = admin_client.get(self.URL_METRICS, {'format': 'json'})
+        methods = {item['method'] for item in response.json()}
+        assert not methods & {'FOO', 'BAR'}, (
+            'Проверьте, что метрики не заводят серию на каждый метод, '
+            'присланный клиентом.'
+        )
+        other = self.get_route(admin_client, 'titles-list', 'other')
+        assert other is not None and other['count'] == 2
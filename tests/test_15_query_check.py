@@ -0,0 +1,81 @@
+import pytest
+
+from api.querycheck import RepeatedQueriesError, get_shape, track_queries
+from api.views import ReviewViewSet, TitleViewSet
+from reviews.models import Review, Title
+from tests.utils import create_reviews, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15QueryCheck:
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def test_01_query_shape(self):
+        assert get_shape('SELECT 1 WHERE id IN (%s, %s, %s)') == get_shape(
+            'SELECT 1 WHERE id IN (%s)'
+        ), 'Проверьте, что списки IN разной длины дают один вид запроса.'
+
+    def test_02_missing_prefetch_fails(self, client, admin_client,
+                                       monkeypatch, settings):
+        titles, _, _ = create_titles(admin_client)
+        settings.QUERY_CHECK_THRESHOLD = len(titles)
+        monkeypatch.setattr(
+            TitleViewSet, 'get_queryset',
+            lambda self: Title.objects.order_by('-rating', '-id')
+        )
+        with pytest.raises(RepeatedQueriesError) as error:
+            client.get(self.TITLES_URL)
+        message = str(error.value)
+        assert 'reviews_genre' in message, (
+            'Проверьте, что запрос жанров для каждого произведения '
+            'считается N+1.'
+        )
+        assert 'api/' in message, (
+            'Проверьте, что в отчёте указано место вызова в коде проекта.'
+        )
+
+    def test_03_missing_select_related_fails(self, client, admin,
+                                             admin_client, user, user_client,
+                                             moderator, moderator_client,
+                                             monkeypatch):
+        _, titles = create_reviews(admin_client, {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client,
+        })
+        monkeypatch.setattr(
+            ReviewViewSet, 'get_queryset',
+            lambda self: Review.objects.filter(
+                title_id=self.kwargs.get('title_id')
+            )
+        )
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        with pytest.raises(RepeatedQueriesError) as error:
+            client.get(url)
+        assert 'users_customuser' in str(error.value), (
+            'Проверьте, что запрос автора для каждого отзыва считается N+1.'
+        )
+
+    def test_04_track_queries(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        with track_queries(threshold=2) as query_check:
+            for title in titles[:2]:
+                Title.objects.get(pk=title['id'])
+        assert query_check.get_repeated(), (
+            'Проверьте, что `track_queries` находит повторы вне запросов '
+            'к API.'
+        )
+
+    def test_05_log_mode_does_not_fail(self, client, admin_client,
+                                       monkeypatch, settings, caplog):
+        titles, _, _ = create_titles(admin_client)
+        settings.QUERY_CHECK = 'log'
+        settings.QUERY_CHECK_THRESHOLD = len(titles)
+        monkeypatch.setattr(
+            TitleViewSet, 'get_queryset',
+            lambda self: Title.objects.order_by('-rating', '-id')
+        )
+        response = client.get(self.TITLES_URL)
+        assert response.status_code == 200
+        assert 'Repeated queries' in caplog.text
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from reviews.models import Comments, Review, Title
+from users.models import CustomUser
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16Benchmark:
+
+    def generate(self):
+        call_command(
+            'generate_catalog', titles=30, reviews=200, comments=500,
+            users=20, seed=1
+        )
+
+    def test_01_generate_catalog(self):
+        self.generate()
+        assert Title.objects.count() == 30
+        assert Review.objects.count() > 0
+        assert Comments.objects.count() == 500
+        counts = sorted(
+            Title.objects.values_list('rating_count', flat=True),
+            reverse=True
+        )
+        assert counts[0] == 20, (
+            'Проверьте, что у самого популярного произведения не больше '
+            'одного отзыва от каждого пользователя.'
+        )
+        assert counts[0] > counts[len(counts) // 2], (
+            'Проверьте, что отзывы распределены по произведениям неравномерно.'
+        )
+        assert sum(counts) == Review.objects.count(), (
+            'Проверьте, что рейтинги пересчитаны после генерации.'
+        )
+
+        call_command('generate_catalog', delete=True)
+        assert not Title.objects.exists()
+        assert not Comments.objects.exists()
+        assert not CustomUser.objects.exists()
+
+    def test_02_benchmark_with_baseline(self, tmp_path, capsys):
+        self.generate()
+        baseline = tmp_path / 'baseline.json'
+        call_command(
+            'benchmark_api', requests=5, warmup=1, save=str(baseline)
+        )
+        results = json.loads(baseline.read_text())
+        assert set(results) == {
+            'titles', 'reviews', 'comments', 'signup', 'token'
+        }
+        for name, result in results.items():
+            assert result['errors'] == 0, name
+            assert result['queries'] > 0, name
+            assert result['p50'] <= result['p95'] <= result['p99']
+        assert not CustomUser.objects.filter(
+            username__startswith='benchmark-signup-'
+        ).exists()
+
+        capsys.readouterr()
+        call_command(
+            'benchmark_api', requests=5, warmup=1, baseline=str(baseline),
+            scenarios=['titles']
+        )
+        assert '%' in capsys.readouterr().out, (
+            'Проверьте, что результаты сравниваются с сохранёнными.'
+        )
+
+        for result in results.values():
+            result['p95'] = 1e-6
+        baseline.write_text(json.dumps(results))
+        with pytest.raises(CommandError):
+            call_command(
+                'benchmark_api', requests=5, warmup=1,
+                baseline=str(baseline), max_regression=10,
+                scenarios=['token']
+            )
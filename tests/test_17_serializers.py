@@ -0,0 +1,71 @@
+import pytest
+from django.core.management import call_command
+from rest_framework.renderers import JSONRenderer
+
+from api.serializers import (
+    CategorySerializer,
+    CommentsSerializer,
+    GenreSerializer,
+    ReviewSerializer,
+    TitleGetSerializer
+)
+from reviews.models import Category, Comments, Genre, Review, Title
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17Serializers:
+
+    def render(self, settings, serializer_class, objects, fast):
+        settings.FAST_READ_SERIALIZERS = fast
+        return JSONRenderer().render(
+            serializer_class(objects, many=True).data
+        )
+
+    def test_01_fast_representation_matches_drf(self, settings, admin_client,
+                                                user, user_client, moderator,
+                                                moderator_client):
+        create_comments(
+            admin_client, {user: user_client, moderator: moderator_client}
+        )
+        # Без категории, жанров и оценок.
+        Title.objects.create(name='Пустое', year=2000)
+        querysets = (
+            (TitleGetSerializer, Title.objects.select_related(
+                'category'
+            ).prefetch_related('genre').order_by('-rating', '-id')),
+            (TitleGetSerializer, Title.objects.order_by('pk')),
+            (ReviewSerializer, Review.objects.select_related('author')),
+            (CommentsSerializer, Comments.objects.select_related('author')),
+            (CategorySerializer, Category.objects.all()),
+            (GenreSerializer, Genre.objects.all()),
+        )
+        for serializer_class, queryset in querysets:
+            objects = list(queryset)
+            assert objects
+            assert self.render(
+                settings, serializer_class, objects, True
+            ) == self.render(settings, serializer_class, objects, False), (
+                f'Проверьте, что `{serializer_class.__name__}` в быстром '
+                'режиме отдаёт тот же JSON, что и DRF.'
+            )
+        data = TitleGetSerializer(
+            Title.objects.get(name='Пустое')
+        ).data
+        assert data['category'] is None
+        assert data['genre'] == []
+        assert data['rating'] is None
+
+    def test_02_benchmark_serializers(self, capsys):
+        call_command(
+            'generate_catalog', titles=20, reviews=50, comments=50,
+            users=10, seed=1
+        )
+        call_command('benchmark_serializers', items=20, rounds=2)
+        output = capsys.readouterr().out
+        for name in ('titles', 'reviews', 'comments', 'categories',
+                     'genres'):
+            assert name in output, (
+                'Проверьте, что `benchmark_serializers` замеряет '
+                f'сериализатор {name}.'
+            )